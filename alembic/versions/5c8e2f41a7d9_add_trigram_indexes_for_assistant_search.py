@@ -0,0 +1,27 @@
+"""Add pg_trgm GIN indexes for assistant name/description search
+
+Revision ID: 5c8e2f41a7d9
+Revises: 93501c24e63a
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c8e2f41a7d9'
+down_revision = '93501c24e63a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_assistants_name_trgm', 'assistants', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_assistants_description_trgm', 'assistants', ['description'], unique=False, postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assistants_description_trgm', table_name='assistants', postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'})
+    op.drop_index('ix_assistants_name_trgm', table_name='assistants', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
@@ -0,0 +1,27 @@
+"""Add generated tsvector column and GIN index for chunk content search
+
+Revision ID: 7d1a9b3e6f20
+Revises: 5c8e2f41a7d9
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '7d1a9b3e6f20'
+down_revision = '5c8e2f41a7d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('chunks', sa.Column('content_tsv', postgresql.TSVECTOR(), sa.Computed("to_tsvector('simple', content)", persisted=True), nullable=True))
+    op.create_index('ix_chunks_content_tsv', 'chunks', ['content_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chunks_content_tsv', table_name='chunks', postgresql_using='gin')
+    op.drop_column('chunks', 'content_tsv')
@@ -1,6 +1,7 @@
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Query, Path
 
+from chat.service import invalidate_assistant_cache
 from database.repository_factory import get_repositories
 from models import (
     CreateAssistantRequest, UpdateAssistantRequest, AssistantResponse,
@@ -87,11 +88,13 @@ async def list_assistants(
             )
             has_more = len(next_page_assistants) > 0
             
+            # Load KB info for the whole page in one query
+            kbs = await repos.kb_repo.get_many_by_ids([assistant.kb_id for assistant in assistants])
+            
             # Convert to response models
             assistant_responses = []
             for assistant in assistants:
-                # Load KB info
-                kb = await repos.kb_repo.get_by_id(assistant.kb_id)
+                kb = kbs.get(assistant.kb_id)
                 
                 assistant_responses.append(AssistantResponse(
                     assistant_id=assistant.assistant_id,
@@ -217,6 +220,7 @@ async def update_assistant(
             
             if not updated_assistant:
                 raise HTTPException(status_code=404, detail="Assistant not found")
+            invalidate_assistant_cache(assistant_id)
             
             # Load KB info
             kb = await repos.kb_repo.get_by_id(updated_assistant.kb_id)
@@ -255,6 +259,7 @@ async def delete_assistant(assistant_id: str = Path(..., description="Assistant
             deleted = await repos.assistant_repo.delete_assistant(assistant_id)
             if not deleted:
                 raise HTTPException(status_code=404, detail="Assistant not found")
+            invalidate_assistant_cache(assistant_id)
             
             return ApiResponse(code=0, data={"message": "Assistant deleted successfully"})
     except HTTPException:
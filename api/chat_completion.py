@@ -5,7 +5,7 @@ from chat.models import (
     AssistantChatRequest, AssistantChatResponse,
     CreateChatSessionRequest, CreateChatSessionResponse, ChatSessionDetail, ChatMessage
 )
-from chat.service import get_chat_service, ChatService
+from chat.service import get_chat_service, ChatService, invalidate_session_cache
 from database.repository_factory import get_repositories
 
 
@@ -231,6 +231,7 @@ async def delete_chat_session(session_id: str = Path(..., description="Chat sess
             deleted = await repos.chat_repo.delete_by_id(session_id)
             if not deleted:
                 raise HTTPException(status_code=404, detail="Chat session not found")
+            invalidate_session_cache(session_id)
             
             return {"message": "Chat session deleted successfully"}
     except HTTPException:
@@ -1,6 +1,7 @@
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Query
 
+from chat.service import invalidate_assistant_cache
 from database.repository_factory import get_repositories
 from models.database.knowledge_base import KnowledgeBaseStatus
 from models import CreateKBRequest, KBResponse, CreateChatSessionRequest, ChatSessionResponse
@@ -108,6 +109,9 @@ async def delete_knowledge_base(kb_id: str):
             if not deleted:
                 raise HTTPException(status_code=404, detail="Knowledge Base not found")
             
+            # Cascade removed the KB's assistants; drop any cached copies
+            invalidate_assistant_cache()
+            
             return {"message": "Knowledge Base deleted successfully", "kb_id": kb_id}
     except HTTPException:
         raise
@@ -230,12 +234,15 @@ async def get_kb_documents(
                 offset=offset
             )
             
+            # Real chunk counts for the whole page in one grouped COUNT
+            chunk_counts = await repos.chunk_repo.count_chunks_by_doc_ids(
+                [doc.doc_id for doc in documents]
+            )
+            
             # Transform to frontend format
             documents_data = []
             for doc in documents:
-                # Get real chunk count from database
-                chunks = await repos.chunk_repo.get_chunks_by_document(doc.doc_id, order_by_index=False)
-                real_chunk_count = len(chunks)
+                real_chunk_count = chunk_counts[doc.doc_id]
                 
                 # Get original processing stats
                 processing_stats = doc.processing_stats or {}
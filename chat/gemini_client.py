@@ -75,7 +75,7 @@ class GeminiChat(BaseChatModel):
         
         return gemini_messages
     
-    def _extract_usage_stats(self, response) -> Dict[str, int]:
+    def extract_usage_stats(self, response) -> Dict[str, int]:
         """Extract token usage from Gemini response"""
         try:
             if hasattr(response, 'usage_metadata'):
@@ -130,7 +130,7 @@ class GeminiChat(BaseChatModel):
                     )
                     
                     content = response.text if response.text else ""
-                    usage = self._extract_usage_stats(response)
+                    usage = self.extract_usage_stats(response)
                     
                     return ChatResponse(
                         content=content,
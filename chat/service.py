@@ -1,18 +1,147 @@
 import logging
+import re
 import time
-from typing import Optional
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 
 from chat.models import AssistantChatRequest, AssistantChatResponse
 from chat.gemini_client import GeminiChat
 from config.chat import get_gemini_config
 from config.llm import get_llm_settings
 from llm.deepseek_client import create_deepseek_client
-from models.tree.retrieval import RetrievalRequest
+from models.tree.retrieval import RetrievalRequest, RetrievedNode
 from models.database.message import MessageRole
 from api.ragflow_raptor import ragflow_retrieve
+from config.cache import get_cache_settings
 from database.repository_factory import get_repositories
 from prompts.chat import RAG_SYSTEM_PROMPT
 from utils.citation_formatter import format_context_passages_for_frontend
+from utils.ttl_cache import TTLCache, cache_manager
+
+
+@dataclass(frozen=True)
+class AssistantSnapshot:
+    """Detached copy of the assistant fields needed per chat turn"""
+    assistant_id: str
+    tenant_id: str
+    kb_id: str
+    name: str
+    system_prompt: Optional[str]
+    resolved_system_prompt: str
+    model_settings: Dict[str, Any]
+
+
+@dataclass(slots=True)
+class RetrievedChunk:
+    """Retrieved chunk normalized once at the retrieval boundary"""
+    content: str
+    doc_id: str
+    chunk_index: int
+    source_id: str
+    similarity_score: float
+    meta: Dict[str, Any]
+
+
+def _to_retrieved_chunks(nodes: List[RetrievedNode]) -> List[RetrievedChunk]:
+    """Convert retrieval response nodes into typed chat chunks"""
+    chunks = []
+    for node in nodes:
+        meta = node.meta
+        doc_id = meta.get('doc_id', 'unknown')
+        chunk_index = meta.get('chunk_index', 0)
+        chunks.append(RetrievedChunk(
+            content=node.content,
+            doc_id=doc_id,
+            chunk_index=chunk_index,
+            source_id=node.source_id or f"{doc_id}_chunk_{chunk_index}",
+            similarity_score=node.similarity_score,
+            meta=meta
+        ))
+    return chunks
+
+
+# Assistant / session lookup caches (lazy init, same pattern as utils.cache)
+_assistant_cache: Optional[TTLCache[AssistantSnapshot]] = None
+_session_owner_cache: Optional[TTLCache[str]] = None
+
+
+def _initialize_lookup_caches():
+    """Initialize assistant and session lookup caches with current settings"""
+    global _assistant_cache, _session_owner_cache
+    
+    settings = get_cache_settings()
+    
+    if _assistant_cache is None:
+        _assistant_cache = TTLCache[AssistantSnapshot](
+            max_size=settings.assistant_cache_max_size,
+            ttl_seconds=settings.assistant_cache_ttl_seconds,
+            name="Assistant"
+        )
+        cache_manager.register_cache("assistant", _assistant_cache)
+    
+    if _session_owner_cache is None:
+        _session_owner_cache = TTLCache[str](
+            max_size=settings.assistant_cache_max_size,
+            ttl_seconds=settings.assistant_cache_ttl_seconds,
+            name="ChatSession"
+        )
+        cache_manager.register_cache("chat_session", _session_owner_cache)
+
+
+async def _get_assistant_cached(repos, assistant_id: str) -> Optional[AssistantSnapshot]:
+    """Get assistant snapshot from cache, falling back to the database"""
+    _initialize_lookup_caches()
+    
+    snapshot = _assistant_cache.get(assistant_id)
+    if snapshot is not None:
+        return snapshot
+    
+    assistant = await repos.assistant_repo.get_assistant_with_kb(assistant_id)
+    if not assistant:
+        return None
+    
+    snapshot = AssistantSnapshot(
+        assistant_id=assistant.assistant_id,
+        tenant_id=assistant.tenant_id,
+        kb_id=assistant.kb_id,
+        name=assistant.name,
+        system_prompt=assistant.system_prompt,
+        resolved_system_prompt=assistant.system_prompt or RAG_SYSTEM_PROMPT,
+        model_settings=dict(assistant.model_settings or {})
+    )
+    _assistant_cache.set(assistant_id, snapshot)
+    return snapshot
+
+
+async def _verify_session_cached(repos, session_id: str, assistant_id: str) -> bool:
+    """Check that a session belongs to the assistant, caching verified pairs"""
+    _initialize_lookup_caches()
+    
+    if _session_owner_cache.get(session_id) == assistant_id:
+        return True
+    
+    session = await repos.chat_repo.get_by_id(session_id)
+    if not session or session.assistant_id != assistant_id:
+        return False
+    
+    _session_owner_cache.set(session_id, assistant_id)
+    return True
+
+
+def invalidate_assistant_cache(assistant_id: Optional[str] = None) -> None:
+    """Drop a cached assistant after update/delete (all assistants if no ID given)"""
+    if _assistant_cache is None:
+        return
+    if assistant_id is None:
+        _assistant_cache.clear()
+    else:
+        _assistant_cache.delete(assistant_id)
+
+
+def invalidate_session_cache(session_id: str) -> None:
+    """Drop a cached session ownership entry after the session is deleted"""
+    if _session_owner_cache is not None:
+        _session_owner_cache.delete(session_id)
 
 
 class ChatService:
@@ -37,20 +166,19 @@ class ChatService:
         )
         
         self.logger = logging.getLogger(__name__)
-        self.logger.info(f"🤖 Chat Service initialized - Primary: {self.llm_config.primary_chat_model}, Fallback: Gemini")
+        self.logger.info("🤖 Chat Service initialized - Primary: %s, Fallback: Gemini", self.llm_config.primary_chat_model)
 
 
     
     async def assistant_chat(self, request: AssistantChatRequest) -> AssistantChatResponse:
         """Chat with an AI assistant, save conversation to database"""
-        import time
         start_time = time.time()
         chat_timings = {}  # Track chat performance
         
         try:
             async with get_repositories() as repos:
-                # Step 1: Get assistant and verify it exists
-                assistant = await repos.assistant_repo.get_assistant_with_kb(request.assistant_id)
+                # Step 1: Get assistant and verify it exists (TTL cached)
+                assistant = await _get_assistant_cached(repos, request.assistant_id)
                 if not assistant:
                     raise ValueError(f"Assistant {request.assistant_id} not found")
                 
@@ -68,16 +196,10 @@ class ChatService:
                     session_id = session.session_id
                 else:
                     # Verify session exists and belongs to this assistant
-                    session = await repos.chat_repo.get_by_id(session_id)
-                    if not session or session.assistant_id != request.assistant_id:
+                    if not await _verify_session_cached(repos, session_id, request.assistant_id):
                         raise ValueError(f"Session {session_id} not found or not associated with assistant")
                 
-                # Step 3: Save user message
-                user_message = await repos.message_repo.create_message(
-                    session_id=session_id,
-                    role=MessageRole.user,
-                    content=request.query
-                )
+                # Step 3: User message is saved together with the reply (Step 8)
                 
                 # Step 4: Build conversation context if requested
                 conversation_context = ""
@@ -88,31 +210,15 @@ class ChatService:
                 
                 # Step 5: Retrieve relevant documents using assistant's KB
                 t_retrieval = time.time()
-                retrieval_request = RetrievalRequest(
-                    query=request.query,
-                    tenant_id=assistant.tenant_id,
-                    kb_id=assistant.kb_id,
-                    top_k=assistant.model_settings.get("top_k", 8) if assistant.model_settings else 8
-                )
-                
-                retrieval_result = await ragflow_retrieve(retrieval_request)
+                chunks = await self._retrieve_and_extract(assistant, request.query)
                 chat_timings["retrieval"] = (time.time() - t_retrieval) * 1000
                 
-                # Extract chunks
-                if hasattr(retrieval_result, 'nodes'):
-                    chunks = retrieval_result.nodes
-                elif hasattr(retrieval_result, 'retrieved_nodes'):
-                    chunks = retrieval_result.retrieved_nodes
-                else:
-                    chunks = []
-                
-                
                 # Step 6: Get model settings
-                model_settings = assistant.model_settings or {}
+                model_settings = assistant.model_settings
                 
                 # Step 7: Generate response with Gemini LLM
                 # Prepare context for LLM
-                system_prompt = assistant.system_prompt or RAG_SYSTEM_PROMPT
+                system_prompt = assistant.resolved_system_prompt
             
                 # Build context sections
                 context_sections = []
@@ -125,12 +231,8 @@ class ChatService:
                 if chunks:
                     retrieved_context_parts = []
                     for chunk in chunks[:5]:
-                        # Create meaningful source ID from chunk metadata
-                        doc_id = getattr(chunk, 'meta', {}).get('doc_id', 'unknown') if hasattr(chunk, 'meta') else 'unknown'
-                        chunk_index = getattr(chunk, 'meta', {}).get('chunk_index', 0) if hasattr(chunk, 'meta') else 0
-                        source_id = f"{doc_id}_chunk_{chunk_index}"
-                        
-                        retrieved_context_parts.append(f"[Source: {source_id}]\n{chunk.content}")
+                        # Source ID is precomputed once by the retrieval layer
+                        retrieved_context_parts.append(f"[Source: {chunk.source_id}]\n{chunk.content}")
                     
                     retrieved_context = "\n\n".join(retrieved_context_parts)
                     context_sections.append(f"Knowledge Base Context:\n{retrieved_context}")
@@ -139,9 +241,9 @@ class ChatService:
                 full_context = "\n\n---\n\n".join(context_sections) if context_sections else ""
             
                 if full_context:
-                    prompt = f"{system_prompt}\n\nContext:\n{full_context}\n\nUser Query: {request.query}"
+                    user_content = "".join(["Context:\n", full_context, "\n\nUser Query: ", request.query])
                 else:
-                    prompt = f"{system_prompt}\n\nUser Query: {request.query}"
+                    user_content = request.query
             
                 # Step 7.1: Try DeepSeek-R1 first (Primary LLM)
                 answer = None
@@ -155,7 +257,7 @@ class ChatService:
                     # Prepare messages for DeepSeek
                     messages = [
                         {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": f"Context:\n{full_context}\n\nUser Query: {request.query}" if full_context else request.query}
+                        {"role": "user", "content": user_content}
                     ]
                     
                     t_llm = time.time()
@@ -168,20 +270,21 @@ class ChatService:
                     thinking_content = deepseek_response["thinking"]
                     chat_timings["llm_response"] = (time.time() - t_llm) * 1000
                     
-                    # Estimate tokens for DeepSeek
-                    input_tokens = sum(len(msg["content"].split()) for msg in messages) * 1.3
-                    output_tokens = len(answer.split()) * 1.3
+                    # Token usage reported by the provider
+                    usage = deepseek_response["usage"]
+                    input_tokens = usage["prompt_tokens"] or 0
+                    output_tokens = usage["completion_tokens"] or 0
                     used_model = self.llm_config.primary_chat_model
                     
-                    self.logger.info(f"✅ DeepSeek-R1 success: {len(answer)} chars")
+                    self.logger.info("✅ DeepSeek-R1 success: %d chars", len(answer))
                     if thinking_content:
-                        self.logger.info(f"🧠 Thinking extracted: {len(thinking_content)} chars")
-                        self.logger.info(f"🧠 Thinking preview: {thinking_content[:200]}...")
+                        self.logger.info("🧠 Thinking extracted: %d chars", len(thinking_content))
+                        self.logger.info("🧠 Thinking preview: %s...", thinking_content[:200])
                     else:
                         self.logger.info("⚠️ No thinking content extracted from DeepSeek response")
                     
                 except Exception as deepseek_error:
-                    self.logger.warning(f"⚠️ DeepSeek-R1 failed: {deepseek_error}")
+                    self.logger.warning("⚠️ DeepSeek-R1 failed: %s", deepseek_error)
                     
                     # Step 7.2: Fallback to Gemini
                     try:
@@ -190,21 +293,28 @@ class ChatService:
                         # Configure Gemini with assistant settings
                         self.gemini_chat.temperature = model_settings.get("temperature", self.gemini_config.temperature)
                         
+                        # Single-string prompt is only needed on the fallback path
+                        if full_context:
+                            prompt = "".join([system_prompt, "\n\n", user_content])
+                        else:
+                            prompt = f"{system_prompt}\n\nUser Query: {request.query}"
+                        
                         t_llm = time.time()
                         response = self.gemini_chat.model.generate_content(prompt)
                         answer = response.text
                         chat_timings["llm_response"] = (time.time() - t_llm) * 1000
                         
                         # Extract token usage for Gemini
-                        input_tokens = len(prompt.split()) * 1.3
-                        output_tokens = len(answer.split()) * 1.3
+                        usage = self.gemini_chat.extract_usage_stats(response)
+                        input_tokens = usage["prompt_tokens"] or 0
+                        output_tokens = usage["completion_tokens"] or 0
                         used_model = self.gemini_config.model_name + " (fallback)"
                         thinking_content = ""  # No thinking from Gemini
                         
-                        self.logger.info(f"✅ Gemini fallback success: {len(answer)} chars")
+                        self.logger.info("✅ Gemini fallback success: %d chars", len(answer))
                         
                     except Exception as gemini_error:
-                        self.logger.error(f"❌ Both LLMs failed - DeepSeek: {deepseek_error}, Gemini: {gemini_error}")
+                        self.logger.error("❌ Both LLMs failed - DeepSeek: %s, Gemini: %s", deepseek_error, gemini_error)
                         answer = "I apologize, but I encountered an error generating a response. Please try again."
                         input_tokens = output_tokens = 0
                         used_model = "error"
@@ -219,48 +329,55 @@ class ChatService:
                 # Use model's thinking to decide citations (much smarter!)
                 self.logger.info("🎯 Analyzing model thinking for citation decision...")
                 should_show_citations = _should_show_citations_from_thinking(thinking_content, answer)
-                self.logger.info(f"📊 Citation decision: {should_show_citations}")
+                self.logger.info("📊 Citation decision: %s", should_show_citations)
                 if should_show_citations:
-                    self.logger.info(f"✅ Will show citations - model referenced chunks in thinking")
+                    self.logger.info("✅ Will show citations - model referenced chunks in thinking")
                 else:
-                    self.logger.info(f"🚫 No citations - model didn't reference specific chunks")
-                self.logger.info(f"📄 Answer preview: {answer[:200]}...")
+                    self.logger.info("🚫 No citations - model didn't reference specific chunks")
+                self.logger.info("📄 Answer preview: %s...", answer[:200])
                 
-                # Step 8: Save assistant message
-                assistant_message = await repos.message_repo.create_message(
-                    session_id=session_id,
-                    role=MessageRole.assistant,
-                    content=answer,
-                    input_tokens=int(input_tokens),
-                    output_tokens=int(output_tokens),
-                    extra_metadata={
-                        "model": used_model,
-                        "temperature": model_settings.get("temperature", 0.7),
-                        "chunks_used": len(chunks),
-                        "context_length": len(full_context),
-                        "llm_strategy": "deepseek_primary_gemini_fallback"
+                # Step 8: Save user + assistant messages with a single flush
+                user_message, assistant_message = await repos.message_repo.create_messages_bulk([
+                    {
+                        "session_id": session_id,
+                        "role": MessageRole.user,
+                        "content": request.query
+                    },
+                    {
+                        "session_id": session_id,
+                        "role": MessageRole.assistant,
+                        "content": answer,
+                        "input_tokens": int(input_tokens),
+                        "output_tokens": int(output_tokens),
+                        "extra_metadata": {
+                            "model": used_model,
+                            "temperature": model_settings.get("temperature", 0.7),
+                            "chunks_used": len(chunks),
+                            "context_length": len(full_context),
+                            "llm_strategy": "deepseek_primary_gemini_fallback"
+                        }
                     }
-                )
+                ])
                 
-                # Step 9: Update session stats (count both user + assistant messages)
-                await repos.chat_repo.increment_message_count(session_id, count=2)
+                # Step 9: Update session stats in the same transaction (no re-select)
+                await repos.chat_repo.increment_message_count(session_id, count=2, return_session=False)
                 
                 # Calculate total chat time
                 total_time = (time.time() - start_time) * 1000
                 chat_timings["total"] = total_time
                 
                 # Log performance breakdown
-                self.logger.info(f"🚀 Chat Performance Breakdown:")
-                self.logger.info(f"   • Retrieval: {chat_timings.get('retrieval', 0):.1f}ms")
-                self.logger.info(f"   • LLM Response ({used_model}): {chat_timings.get('llm_response', 0):.1f}ms") 
-                self.logger.info(f"   • Total: {total_time:.1f}ms")
+                self.logger.info("🚀 Chat Performance Breakdown:")
+                self.logger.info("   • Retrieval: %.1fms", chat_timings.get('retrieval', 0))
+                self.logger.info("   • LLM Response (%s): %.1fms", used_model, chat_timings.get('llm_response', 0))
+                self.logger.info("   • Total: %.1fms", total_time)
                 
                 # Generate context passages for response (single call)
                 final_context_passages = self._debug_format_context_passages(
                     chunks, should_show_citations, request.query, thinking_content, answer
                 )
                 
-                self.logger.info(f"🎯 Final response will include {len(final_context_passages)} context passages")
+                self.logger.info("🎯 Final response will include %d context passages", len(final_context_passages))
                 
                 return AssistantChatResponse(
                     answer=answer,
@@ -287,99 +404,116 @@ class ChatService:
                 )
                 
         except Exception as e:
-            self.logger.error(f"Assistant chat failed: {e}")
+            self.logger.error("Assistant chat failed: %s", e)
             raise ValueError(f"Chat failed: {str(e)}")
     
+    async def _retrieve_and_extract(self, assistant: AssistantSnapshot, query: str) -> List[RetrievedChunk]:
+        """Retrieve from the assistant's KB and return typed chunks"""
+        retrieval_request = RetrievalRequest(
+            query=query,
+            tenant_id=assistant.tenant_id,
+            kb_id=assistant.kb_id,
+            top_k=assistant.model_settings.get("top_k", 8)
+        )
+        
+        retrieval_result = await ragflow_retrieve(retrieval_request)
+        return _to_retrieved_chunks(retrieval_result.retrieved_nodes)
+    
     def _debug_format_context_passages(self, chunks, should_show_citations, user_query, thinking_content, answer):
         """Debug helper to trace context passage generation"""
-        self.logger.info(f"🔍 Context passage debug:")
-        self.logger.info(f"   • Chunks available: {len(chunks) if chunks else 0}")
-        self.logger.info(f"   • Should show citations: {should_show_citations}")
+        self.logger.info("🔍 Context passage debug:")
+        self.logger.info("   • Chunks available: %d", len(chunks) if chunks else 0)
+        self.logger.info("   • Should show citations: %s", should_show_citations)
         
         if should_show_citations and chunks:
-            from utils.citation_formatter import format_context_passages_for_frontend
             result = format_context_passages_for_frontend(
                 retrieved_nodes=chunks,
                 user_query=user_query,
                 thinking_content=thinking_content,
                 model_answer=answer
             )
-            self.logger.info(f"   • Generated passages: {len(result)}")
+            self.logger.info("   • Generated passages: %d", len(result))
             if result:
                 for i, passage in enumerate(result):
-                    self.logger.info(f"     {i+1}. {passage['source_id']}: {passage['relevant_excerpt'][:80]}...")
+                    self.logger.info("     %d. %s: %s...", i + 1, passage['source_id'], passage['relevant_excerpt'][:80])
             else:
                 self.logger.warning("   ⚠️ format_context_passages_for_frontend returned empty list!")
             return result
         else:
-            self.logger.info(f"   • Skipping: should_show={should_show_citations}, chunks={len(chunks) if chunks else 0}")
+            self.logger.info("   • Skipping: should_show=%s, chunks=%d", should_show_citations, len(chunks) if chunks else 0)
             return []
 
+_CITE_LOGGER = logging.getLogger("chat.service")
+
+# "No information" phrases in the answer that suppress citations
+_NO_INFO_PHRASES = [
+    "don't have enough information", "does not contain", 
+    "no information", "not available", "cannot find",
+    "no relevant information", "not mentioned"
+]
+_NO_INFO_RE = re.compile("|".join(re.escape(phrase) for phrase in _NO_INFO_PHRASES), re.IGNORECASE)
+
+
+def _answer_has_no_info(answer: str) -> bool:
+    """Check whether the answer contains any "no information" phrase"""
+    return _NO_INFO_RE.search(answer) is not None
+
+# Single-pass detection of chunk references, analysis language and source references
+_CITE_RE = re.compile(
+    r"(?P<chunk>chunk(?:[_\s]*(?P<chunk_num>\d+))?)"
+    r"|(?P<analysis>mentions|states|shows|according|based on|looking at|checking)"
+    r"|(?P<source>context|sources|knowledge|provided)",
+    re.IGNORECASE
+)
+
+
 def _should_show_citations_from_thinking(thinking_content: str, answer: str) -> bool:
     """
     Decide citations based on model's thinking - much simpler and more accurate!
     If model referenced chunks in thinking → show citations
     If model said no info → no citations
     """
-    import logging
-    logger = logging.getLogger("chat.service")
+    logger = _CITE_LOGGER
     
     if not thinking_content:
         logger.info("🤷 No thinking content available - defaulting to no citations")
         return False
     
-    thinking_lower = thinking_content.lower()
-    answer_lower = answer.lower()
-    
     # Check for "no information" responses first
-    no_info_phrases = [
-        "don't have enough information", "does not contain", 
-        "no information", "not available", "cannot find",
-        "no relevant information", "not mentioned"
-    ]
-    
-    if any(phrase in answer_lower for phrase in no_info_phrases):
+    if _answer_has_no_info(answer):
         logger.info("🚫 Answer indicates no information available")
         return False
     
-    # Dynamic detection of chunk references - no hardcoded patterns
-    import re
-    
-    # Primary indicators: explicit chunk mentions
-    explicit_chunks = re.findall(r'chunk[_\s]*(\d+)', thinking_lower)
-    
-    # Secondary indicators: reference language patterns (dynamic detection)
-    reference_indicators = []
+    # Dynamic detection of chunk references in one scan over the thinking
+    explicit_chunks = []  # Primary indicators: explicit chunk mentions
+    reference_indicators = {}  # Secondary indicators (ordered, de-duplicated)
     
-    # Look for any mention of "chunk" with context
-    if 'chunk' in thinking_lower:
-        reference_indicators.append('chunk_reference')
-    
-    # Look for analysis language
-    analysis_terms = ['mentions', 'states', 'shows', 'according', 'based on', 'looking at', 'checking']
-    for term in analysis_terms:
-        if term in thinking_lower:
-            reference_indicators.append(f'analysis_{term}')
-    
-    # Look for source/context references  
-    if any(word in thinking_lower for word in ['context', 'sources', 'knowledge', 'provided']):
-        reference_indicators.append('source_reference')
+    for match in _CITE_RE.finditer(thinking_content):
+        kind = match.lastgroup
+        if kind == "chunk":
+            reference_indicators["chunk_reference"] = None
+            if match.group("chunk_num"):
+                explicit_chunks.append(match.group("chunk_num"))
+        elif kind == "analysis":
+            reference_indicators[f"analysis_{match.group(kind).lower()}"] = None
+        else:
+            reference_indicators["source_reference"] = None
     
     chunks_referenced = len(explicit_chunks) > 0 or len(reference_indicators) >= 2
-    found_patterns = reference_indicators[:3]  # Top patterns
+    found_patterns = list(reference_indicators)[:3]  # Top patterns
     
     # Use explicit chunks as matches  
     chunk_matches = explicit_chunks
     
     if chunks_referenced:
-        logger.info(f"✅ Model referenced chunks in thinking")
-        logger.info(f"🔍 Found patterns: {found_patterns[:3]}")
+        logger.info("✅ Model referenced chunks in thinking")
+        logger.info("🔍 Found patterns: %s", found_patterns[:3])
         if chunk_matches:
-            logger.info(f"📋 Specific chunks: {chunk_matches[:3]}")
+            logger.info("📋 Specific chunks: %s", chunk_matches[:3])
         return True
     else:
         logger.info("❌ Model didn't reference any chunks in thinking")
-        logger.info(f"💭 Thinking preview: {thinking_content[:150]}...")
+        logger.info("💭 Thinking preview: %s...", thinking_content[:150])
         return False
 
 
@@ -1,6 +1,12 @@
+import asyncio
+import os
 import re
-from typing import List
-from utils import token_count
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional
+from utils import token_count, token_count_batch
+
+_RE_SENT_SPLIT = re.compile(r'([.!?。！？])')
 
 
 def clean_content(text: str, preserve_structure: bool = True) -> str:
@@ -61,6 +67,51 @@ def clean_content(text: str, preserve_structure: bool = True) -> str:
     return text.strip()
 
 
+# Documents at least this large are cleaned/chunked in the process pool
+PROCESS_POOL_MIN_CHARS = 50000
+
+# Shared worker pool for CPU-bound cleaning and chunking (created lazily)
+_chunk_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_chunk_pool() -> ProcessPoolExecutor:
+    """Get or create the process pool used for cleaning and chunking"""
+    global _chunk_pool
+    if _chunk_pool is None:
+        _chunk_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _chunk_pool
+
+
+def shutdown_chunk_pool() -> None:
+    """Shut down the shared pool if it was started (app shutdown hook)"""
+    global _chunk_pool
+    if _chunk_pool is not None:
+        _chunk_pool.shutdown(wait=False, cancel_futures=True)
+        _chunk_pool = None
+
+
+def clean_content_batch(texts: List[str], preserve_structure: bool = True) -> List[str]:
+    """Clean many documents in parallel across processes (order preserved)"""
+    if len(texts) < 2:
+        return [clean_content(text, preserve_structure) for text in texts]
+    
+    workers = os.cpu_count() or 1
+    chunksize = max(1, len(texts) // (workers * 4))
+    worker = partial(clean_content, preserve_structure=preserve_structure)
+    return list(get_chunk_pool().map(worker, texts, chunksize=chunksize))
+
+
+async def clean_content_async(text: str, preserve_structure: bool = True) -> str:
+    """Clean a document off the event loop (process pool for large ones, else a worker thread)"""
+    if len(text) >= PROCESS_POOL_MIN_CHARS:
+        # Regex passes hold the GIL, so large documents go to another process
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_chunk_pool(), partial(clean_content, text, preserve_structure)
+        )
+    return await asyncio.to_thread(clean_content, text, preserve_structure)
+
+
 def force_split_large_text(text: str, max_tokens: int) -> List[str]:
     """Force split text that's too large, even without delimiters"""
     if not text or token_count(text) <= max_tokens:
@@ -69,32 +120,40 @@ def force_split_large_text(text: str, max_tokens: int) -> List[str]:
     parts = []
     
     # Try splitting by sentences first (support multiple languages)
-    sentences = re.split(r'([.!?。！？])', text)
-    current_part = ""
-    
-    for i in range(0, len(sentences), 2):  # Process sentence + delimiter pairs
-        sentence = sentences[i] if i < len(sentences) else ""
-        delimiter = sentences[i + 1] if i + 1 < len(sentences) else ""
+    pieces = _RE_SENT_SPLIT.split(text)
+    sentences = [
+        pieces[i] + (pieces[i + 1] if i + 1 < len(pieces) else "")  # Sentence + delimiter pairs
+        for i in range(0, len(pieces), 2)
+    ]
+    
+    # Tokenize all sentences in one batched call, then greedy pack by counts
+    sentence_tokens = token_count_batch(sentences)
+    current_sentences = []
+    current_tokens = 0
+    
+    for sentence, tokens in zip(sentences, sentence_tokens):
+        if current_tokens + tokens <= max_tokens:
+            current_sentences.append(sentence)
+            current_tokens += tokens
+            continue
         
-        test_part = current_part + sentence + delimiter
+        # Save current part and start new one
+        if current_sentences:
+            parts.append("".join(current_sentences).strip())
+        current_sentences = [sentence]
+        current_tokens = tokens
         
-        if token_count(test_part) <= max_tokens:
-            current_part = test_part
-        else:
-            # Save current part and start new one
-            if current_part:
-                parts.append(current_part.strip())
-            current_part = sentence + delimiter
-            
-            # If single sentence is still too long, split by words
-            if token_count(current_part) > max_tokens:
-                word_parts = split_by_words(current_part, max_tokens)
-                parts.extend(word_parts[:-1])  # Add all but last
-                current_part = word_parts[-1] if word_parts else ""
+        # If single sentence is still too long, split by words
+        if tokens > max_tokens:
+            word_parts = split_by_words(sentence, max_tokens)
+            parts.extend(word_parts[:-1])  # Add all but last
+            last_part = word_parts[-1] if word_parts else ""
+            current_sentences = [last_part]
+            current_tokens = token_count(last_part)
     
     # Add remaining part
-    if current_part:
-        parts.append(current_part.strip())
+    if current_sentences:
+        parts.append("".join(current_sentences).strip())
     
     return [p for p in parts if p.strip()]
 
@@ -102,29 +161,24 @@ def force_split_large_text(text: str, max_tokens: int) -> List[str]:
 def split_by_words(text: str, max_tokens: int) -> List[str]:
     """Split text by words when sentences are too long"""
     words = text.split()
+    word_tokens = token_count_batch(words)
     parts = []
-    current_part = ""
+    current_words = []
+    current_tokens = 0
     
-    for word in words:
-        test_part = current_part + " " + word if current_part else word
-        
-        if token_count(test_part) <= max_tokens:
-            current_part = test_part
+    for word, tokens in zip(words, word_tokens):
+        if current_tokens + tokens <= max_tokens:
+            current_words.append(word)
+            current_tokens += tokens
         else:
             # Save current part and start new one
-            if current_part:
-                parts.append(current_part)
-            current_part = word
+            if current_words:
+                parts.append(" ".join(current_words))
+            current_words = [word]
+            current_tokens = tokens
     
     # Add remaining part
-    if current_part:
-        parts.append(current_part)
+    if current_words:
+        parts.append(" ".join(current_words))
     
     return parts
-
-
-
-
-
-
-
@@ -1,8 +1,42 @@
 import re
-from typing import List
-from functools import lru_cache
+from typing import Dict, List, Tuple
 from models.document import DocumentChunk
-from utils import token_count
+from utils import token_count, token_count_batch
+
+
+def get_suffix_with_tokens(text: str, target_tokens: int) -> Tuple[str, int]:
+
+    if target_tokens <= 0:
+        return "", 0
+    
+    # Split by words for precision
+    words = text.split()
+    if not words:
+        return "", 0
+    
+    # Walk words from the end, summing per-word counts (" word" form, as inside a text)
+    total = 0
+    i = len(words)
+    while i > 0:
+        word_tokens = token_count(" " + words[i - 1])
+        if total + word_tokens > target_tokens:
+            break
+        total += word_tokens
+        i -= 1
+    
+    if i == len(words):
+        return "", 0
+    
+    # The sum is only an estimate of the joined suffix; count it once and trim if over
+    suffix_words = words[i:]
+    suffix = " ".join(suffix_words)
+    suffix_tokens = token_count(suffix)
+    while suffix_tokens > target_tokens and len(suffix_words) > 1:
+        suffix_words = suffix_words[1:]
+        suffix = " ".join(suffix_words)
+        suffix_tokens = token_count(suffix)
+    
+    return (suffix, suffix_tokens) if suffix_tokens <= target_tokens else ("", 0)
 
 
 class ChunkOptimizer:
@@ -16,33 +50,8 @@ class ChunkOptimizer:
         return []
 
     @staticmethod
-    def get_text_by_token_count(text: str, target_tokens: int) -> str:
-
-        if target_tokens <= 0:
-            return ""
-        
-        # Split by words for precision
-        words = text.split()
-        if not words:
-            return ""
-        
-        # Start from the end and work backwards (for overlap)
-        # Use REAL token counting instead of estimation
-        current_tokens = 0
-        selected_words = []
-        
-        for word in reversed(words):
-            # Test adding this word
-            test_text = " ".join([word] + selected_words)
-            test_tokens = token_count(test_text)
-            
-            if test_tokens > target_tokens:
-                break
-                
-            selected_words.insert(0, word)  # Add to beginning
-            current_tokens = test_tokens
-        
-        return " ".join(selected_words)
+    def get_suffix_with_tokens(text: str, target_tokens: int) -> Tuple[str, int]:
+        return get_suffix_with_tokens(text, target_tokens)
 
     @staticmethod
     def batch_token_count(texts: List[str], token_cache_enabled: bool, 
@@ -50,12 +59,15 @@ class ChunkOptimizer:
         if not texts:
             return []
         
-        # If token caching is enabled, still count individually (cache benefits)
+        # Cached counter: serve hits from cache, batch-encode only the misses
         if token_cache_enabled and cached_token_count_func:
+            count_batch = getattr(cached_token_count_func, "count_batch", None)
+            if count_batch is not None:
+                return count_batch(texts)
             return [cached_token_count_func(text) for text in texts]
         
-        # Otherwise, fallback to individual counting
-        return [token_count(text) for text in texts]
+        # Otherwise, one batched tokenizer call
+        return token_count_batch(texts)
 
 
 class ChunkStatistics:
@@ -91,5 +103,48 @@ class TokenCacheManager:
     def create_cached_token_counter(cache_enabled: bool, cache_max_size: int = 10000):
 
         if cache_enabled:
-            return lru_cache(maxsize=cache_max_size)(token_count)
+            return CachedTokenCounter(cache_max_size)
         return token_count
+    
+    @staticmethod
+    def clear(token_counter) -> None:
+        """Drop cached counts; call once per document (no-op for the uncached counter)"""
+        if isinstance(token_counter, CachedTokenCounter):
+            token_counter.cache_clear()
+
+
+class CachedTokenCounter:
+    """Per-document token counter that can fill cache misses with one batched tokenizer call"""
+    
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        # Plain dict: the cache lives for one document, so LRU bookkeeping is not needed
+        self._cache: Dict[str, int] = {}
+    
+    def __call__(self, text: str) -> int:
+        count = self._cache.get(text)
+        if count is None:
+            count = token_count(text)
+            self._store(text, count)
+        return count
+    
+    def count_batch(self, texts: List[str]) -> List[int]:
+        counts = [self._cache.get(text) for text in texts]
+        misses = list(dict.fromkeys(text for text, count in zip(texts, counts) if count is None))
+        
+        if misses:
+            miss_counts = dict(zip(misses, token_count_batch(misses)))
+            for text, count in miss_counts.items():
+                self._store(text, count)
+            counts = [miss_counts[text] if count is None else count for text, count in zip(texts, counts)]
+        
+        return counts
+    
+    def cache_clear(self) -> None:
+        self._cache.clear()
+    
+    def _store(self, text: str, count: int) -> None:
+        # Safety bound for oversized documents: start over rather than track recency
+        if len(self._cache) >= self.max_size:
+            self._cache.clear()
+        self._cache[text] = count
@@ -1,9 +1,13 @@
+import asyncio
 import logging
 import re
-from typing import List, Tuple, Optional, Callable
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple, Optional, Callable
 from models.document import DocumentChunk
-from utils import token_count
-from .chunk_clean import clean_content, force_split_large_text
+from utils import token_count, token_count_batch
+from config.chunking import get_chunking_settings
+from config.cache import get_cache_settings
+from .chunk_clean import clean_content_async, force_split_large_text, get_chunk_pool, PROCESS_POOL_MIN_CHARS
 from .chunk_helpers import ChunkOptimizer, ChunkStatistics, TokenCacheManager
 
 logger = logging.getLogger("hierarchical_chunker")
@@ -32,92 +36,50 @@ def ragflow_get_delimiters(delimiters: str):
     dels_pattern = "|".join(dels)
     return dels_pattern
 
+@lru_cache(maxsize=32)
+def ragflow_compile_splitter(delimiter_pattern: str) -> "re.Pattern":
+    """
+    Compiled delimiter splitter (capturing, so delimiters land at odd indices)
+    """
+    return re.compile(f"({delimiter_pattern})", re.DOTALL)
+
 def ragflow_smart_split(text: str, delimiter_pattern: str, max_tokens: int, token_counter):
     """
     RAGFlow-inspired smart text splitting that respects semantic boundaries
     """
-    if token_counter(text) <= max_tokens:
+    # Every token covers at least one UTF-8 byte (<= 4 per char), so short text fits untokenized
+    if len(text) * (1 if text.isascii() else 4) <= max_tokens or token_counter(text) <= max_tokens:
         return [text]
     
     # Split by delimiters while preserving them
-    parts = re.split(f"({delimiter_pattern})", text, flags=re.DOTALL)
+    parts = ragflow_compile_splitter(delimiter_pattern).split(text)
     result = []
     current = ""
     
-    for part in parts:
+    # Even indices hold the text between delimiters (odd ones are the delimiters)
+    for part in parts[::2]:
         if not part:
             continue
             
-        # Skip if part is just a delimiter
-        if re.match(f"^{delimiter_pattern}$", part):
-            continue
-            
         # Check if adding this part would exceed token limit
+        # (the candidate string is built once and kept on success, no second concat)
         test_text = current + part
         if current and token_counter(test_text) > max_tokens:
             # Save current chunk and start new one
-            if current.strip():
-                result.append(current.strip())
+            stripped = current.strip()
+            if stripped:
+                result.append(stripped)
             current = part
         else:
-            current += part
+            current = test_text
     
     # Add final chunk
-    if current.strip():
-        result.append(current.strip())
+    stripped = current.strip()
+    if stripped:
+        result.append(stripped)
     
     return result
 
-def get_text_by_token_count(text: str, target_tokens: int, token_counter) -> str:
-    """
-    Extract text up to target token count, word-boundary aware
-    """
-    if not text or target_tokens <= 0:
-        return ""
-    
-    words = text.split()
-    if not words:
-        return text[:target_tokens * 4]  # Rough character estimate
-    
-    # Binary search for optimal word count
-    left, right = 0, len(words)
-    result = ""
-    
-    while left <= right:
-        mid = (left + right) // 2
-        candidate = " ".join(words[:mid])
-        tokens = token_counter(candidate)
-        
-        if tokens <= target_tokens:
-            result = candidate
-            left = mid + 1
-        else:
-            right = mid - 1
-    
-    return result
-
-def get_token_overlap(text: str, overlap_tokens: int, token_counter, from_end: bool = True) -> str:
-    """
-    Extract token-based overlap from text, maintaining word boundaries
-    """
-    if not text or overlap_tokens <= 0:
-        return ""
-    
-    words = text.split()
-    if not words:
-        return ""
-    
-    if from_end:
-        # Get overlap from end of text
-        for i in range(len(words)):
-            candidate = " ".join(words[i:])
-            if token_counter(candidate) <= overlap_tokens:
-                return candidate
-        return " ".join(words[-1:])  # At least last word
-    else:
-        # Get overlap from beginning of text  
-        return get_text_by_token_count(text, overlap_tokens, token_counter)
-
 # RAGFlow-style bullet patterns for different hierarchy levels
 BULLET_PATTERNS = [
     [  # Pattern set 0: Roman numerals and basic
@@ -137,15 +99,94 @@ BULLET_PATTERNS = [
     ]
 ]
 
+def _pattern_leading_chars(pattern: str) -> Optional[Set[str]]:
+    """
+    First characters a ^-anchored bullet pattern can match, None if unknown
+    """
+    if not pattern.startswith("^") or len(pattern) < 2:
+        return None
+    body = pattern[1:]
+    
+    if body[0] == "[":
+        end = body.find("]", 2)
+        if end == -1 or body[1] == "^":
+            return None
+        spec = body[1:end]
+        chars = set()
+        i = 0
+        while i < len(spec):
+            if spec[i] == "\\":
+                if i + 1 >= len(spec) or spec[i + 1].isalnum():
+                    return None  # Class escapes like \d, \w
+                chars.add(spec[i + 1])
+                i += 2
+            elif i + 2 < len(spec) and spec[i + 1] == "-":
+                chars.update(chr(o) for o in range(ord(spec[i]), ord(spec[i + 2]) + 1))
+                i += 3
+            else:
+                chars.add(spec[i])
+                i += 1
+        atom_end = end + 1
+    elif body[0] == "\\":
+        if len(body) < 2 or body[1].isalnum():
+            return None
+        chars = {body[1]}
+        atom_end = 2
+    elif body[0] in ".()|?*+{$":
+        return None
+    else:
+        chars = {body[0]}
+        atom_end = 1
+    
+    # First atom must be mandatory
+    rest = body[atom_end:]
+    if rest[:1] in ("?", "*") or rest.startswith("{0"):
+        return None
+    return chars
+
+
+def _build_bullet_dispatch(patterns: List[str]) -> Tuple[Dict[str, "re.Pattern"], Optional["re.Pattern"]]:
+    """
+    Map a line's first character to a fused regex of the bullet patterns it can match
+    
+    Returns:
+        (dispatch, fallback) - fallback covers patterns with unknown leading chars
+    """
+    leading = [_pattern_leading_chars(pattern) for pattern in patterns]
+    fallback_levels = [level for level, chars in enumerate(leading) if chars is None]
+    fused = {}
+    
+    def fuse(levels: Tuple[int, ...]) -> Optional["re.Pattern"]:
+        if not levels:
+            return None
+        if levels not in fused:
+            fused[levels] = re.compile("|".join(f"(?P<lvl{i}>{patterns[i]})" for i in levels))
+        return fused[levels]
+    
+    levels_by_char: Dict[str, Set[int]] = {}
+    for level, chars in enumerate(leading):
+        for char in chars or ():
+            levels_by_char.setdefault(char, set()).add(level)
+    
+    dispatch = {
+        char: fuse(tuple(sorted(levels.union(fallback_levels))))
+        for char, levels in levels_by_char.items()
+    }
+    return dispatch, fuse(tuple(fallback_levels))
+
+
+def _chunk_texts_in_process(chunker_config: dict, cleaned_text: str, max_chunk_tokens: int) -> Tuple[List[str], int]:
+    """Process-pool entry point (top-level so it pickles)"""
+    chunker = HierarchicalChunker(**chunker_config)
+    return chunker._chunk_texts(cleaned_text, max_chunk_tokens)
+
+
 class HierarchicalChunker:
     """RAGFlow-optimized hierarchical chunker for structured documents"""
     
     def __init__(self, chunk_size: int = None, delimiter: str = None, 
                  overlap_percent: int = None, pattern_set: int = None):
         # Get defaults from config
-        from config.chunking import get_chunking_settings
-        from config.cache import get_cache_settings
-        
         config = get_chunking_settings()
         cache_config = get_cache_settings()
         
@@ -168,6 +209,18 @@ class HierarchicalChunker:
         # Pattern setup with caching (using helpers)
         self.bullet_patterns = BULLET_PATTERNS[self.pattern_set] if self.pattern_set < len(BULLET_PATTERNS) else BULLET_PATTERNS[2]
         self._compiled_patterns = ChunkOptimizer.setup_pattern_cache(self.bullet_patterns, self.pattern_cache_enabled)
+        # First-char dispatch to fused alternations; level read from lastgroup
+        bullet_dispatch, bullet_fallback = _build_bullet_dispatch(self.bullet_patterns)
+        # Bound .match methods so the per-line path skips attribute lookups
+        self._bullet_matchers = {char: pattern.match for char, pattern in bullet_dispatch.items()}
+        self._bullet_fallback_match = bullet_fallback.match if bullet_fallback else None
+        self._group_levels = {f"lvl{i}": i for i in range(len(self.bullet_patterns))}
+        self._has_digit = re.compile(r'\d').search  # Bound presence test
+        self._header_re = re.compile(r'^#+')
+        # Markdown header lines split out of the document in one MULTILINE sweep
+        self._section_splitter = re.compile(r'^[ \t]*(#+[^\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]*)', re.MULTILINE)
+        # Bullet patterns that may still claim a '#' line (e.g. pattern set 2)
+        self._hash_bullet_match = self._bullet_matchers.get("#", self._bullet_fallback_match)
         
         # Token counting cache (using helpers)
         self.token_cache_enabled = cache_config.token_cache_enabled
@@ -176,6 +229,11 @@ class HierarchicalChunker:
             cache_config.token_cache_max_size
         )
         
+        self._tokens_of_many = self._select_token_backend()
+        
+        # Tokens added by the "\n" separator when appending to a chunk (probed once)
+        self._newline_tokens = self._token_count("\n")
+        
         logger.info(f"HierarchicalChunker optimized: size={self.chunk_size}, patterns={len(self._compiled_patterns)}, token_cache={self.token_cache_enabled}, overlap_mode={'token-aware' if self.token_aware_overlap else 'char-based'}")
     
     async def chunk_only(self, text: str, doc_id: str, max_chunk_tokens: Optional[int] = None, 
@@ -188,79 +246,70 @@ class HierarchicalChunker:
         if max_chunk_tokens is None:
             max_chunk_tokens = self.chunk_size
         
+        # Token cache is scoped to a single document
+        TokenCacheManager.clear(self._token_count)
+        
         # Step 1: Clean content
         if progress_callback:
             progress_callback(f"Starting content cleaning for document {doc_id}")
-        cleaned_text = clean_content(text)
+        cleaned_text = await clean_content_async(text)
         
-        # Step 2: Detect structure and create sections
+        # Steps 2-3: Detect structure and apply hierarchical merge off the event loop
+        # (large documents go to the process pool, the rest to a worker thread)
         if progress_callback:
             progress_callback("Analyzing document structure and hierarchy")
-        sections = self._detect_sections(cleaned_text)
-        
-        if progress_callback:
-            progress_callback(f"Detected {len(sections)} structured sections")
-        
-        # Step 3: Apply hierarchical merge
-        if progress_callback:
-            progress_callback(f"Starting hierarchical chunking with {max_chunk_tokens} token limit")
-        chunk_texts = self._hierarchical_merge(sections, max_chunk_tokens)
+        loop = asyncio.get_running_loop()
+        if len(cleaned_text) >= PROCESS_POOL_MIN_CHARS:
+            # The worker process can't reach the callback; announce the hand-off, stage messages follow the result
+            if progress_callback:
+                progress_callback(f"Chunking {len(cleaned_text)} characters in a worker process")
+            chunk_texts, section_count = await loop.run_in_executor(
+                get_chunk_pool(), _chunk_texts_in_process,
+                self._serializable_config(), cleaned_text, max_chunk_tokens
+            )
+            if progress_callback:
+                progress_callback(f"Detected {section_count} structured sections")
+                progress_callback(f"Hierarchical chunking done with {max_chunk_tokens} token limit")
+        else:
+            # Stage messages are sent live, hopped back onto the event loop
+            thread_progress = None
+            if progress_callback:
+                thread_progress = lambda message: loop.call_soon_threadsafe(progress_callback, message)
+            chunk_texts, section_count = await asyncio.to_thread(
+                self._chunk_texts, cleaned_text, max_chunk_tokens, thread_progress
+            )
         
         # Step 4: Convert to DocumentChunk objects with optimized token counting
         if progress_callback:
             progress_callback(f"Converting {len(chunk_texts)} text chunks to DocumentChunk objects")
+        # Constant metadata built once; only actual_tokens varies per chunk
+        base_metadata = {
+            "chunking_method": "hierarchical_structure_aware_optimized",
+            "chunk_size": self.chunk_size,
+            "overlap_percent": self.overlap_percent,
+            "overlap_mode": "token-aware" if self.token_aware_overlap else "char-based",
+            "pattern_set": self.pattern_set,
+            "pattern_cache_enabled": self.pattern_cache_enabled,
+            "structure_detected": True
+        }
+        
+        # Token counting goes through the backend picked at init (batched when enabled)
+        # Each text is stripped exactly once
+        indexed_texts = [(i, stripped) for i, text in enumerate(chunk_texts) for stripped in (text.strip(),) if stripped]
+        if progress_callback and self.batch_token_counting and indexed_texts:
+            progress_callback("Performing batch token counting optimization")
+        token_counts = self._tokens_of_many([text for _, text in indexed_texts])
+        
+        chunk_id_prefix = f"{doc_id}_chunk_"
         chunks = []
-        if self.batch_token_counting and chunk_texts:
-            # Batch token counting for performance (using helpers)
-            stripped_texts = [text.strip() for text in chunk_texts if text.strip()]
-            if progress_callback:
-                progress_callback("Performing batch token counting optimization")
-            token_counts = ChunkOptimizer.batch_token_count(stripped_texts, self.token_cache_enabled, self._token_count)
-            
-            text_index = 0
-            for i, chunk_text in enumerate(chunk_texts):
-                if chunk_text.strip():
-                    actual_token_count = token_counts[text_index]
-                    chunk = DocumentChunk(
-                        chunk_id=f"{doc_id}_chunk_{i}",
-                        doc_id=doc_id,
-                        content=chunk_text.strip(),
-                        chunk_index=i,
-                        metadata={
-                            "chunking_method": "hierarchical_structure_aware_optimized",
-                            "chunk_size": self.chunk_size,
-                            "actual_tokens": actual_token_count,
-                            "overlap_percent": self.overlap_percent,
-                            "overlap_mode": "token-aware" if self.token_aware_overlap else "char-based",
-                            "pattern_set": self.pattern_set,
-                            "pattern_cache_enabled": self.pattern_cache_enabled,
-                            "structure_detected": True
-                        }
-                    )
-                    chunks.append(chunk)
-                    text_index += 1
-        else:
-            # Individual processing (fallback)
-            for i, chunk_text in enumerate(chunk_texts):
-                if chunk_text.strip():
-                    actual_token_count = self._token_count(chunk_text.strip())
-                    chunk = DocumentChunk(
-                        chunk_id=f"{doc_id}_chunk_{i}",
-                        doc_id=doc_id,
-                        content=chunk_text.strip(),
-                        chunk_index=i,
-                        metadata={
-                            "chunking_method": "hierarchical_structure_aware_optimized",
-                            "chunk_size": self.chunk_size,
-                            "actual_tokens": actual_token_count,
-                            "overlap_percent": self.overlap_percent,
-                            "overlap_mode": "token-aware" if self.token_aware_overlap else "char-based",
-                            "pattern_set": self.pattern_set,
-                            "pattern_cache_enabled": self.pattern_cache_enabled,
-                            "structure_detected": True
-                        }
-                    )
-                    chunks.append(chunk)
+        for (i, chunk_text), actual_token_count in zip(indexed_texts, token_counts):
+            chunks.append(DocumentChunk(
+                chunk_id=chunk_id_prefix + str(i),
+                doc_id=doc_id,
+                content=chunk_text,
+                chunk_index=i,
+                metadata={**base_metadata, "actual_tokens": actual_token_count}
+            ))
         
         # Step 5: Finalization
         if progress_callback:
@@ -269,6 +318,39 @@ class HierarchicalChunker:
         logger.info(f"✅ Hierarchical chunking complete: {len(chunks)} chunks from {len(text)} chars")
         return chunks
     
+    def _chunk_texts(self, cleaned_text: str, max_chunk_tokens: int,
+                     progress_callback: Optional[Callable[[str], None]] = None) -> Tuple[List[str], int]:
+        """Synchronous core of chunk_only: sections -> batched token counts -> merge"""
+        sections = self._detect_sections(cleaned_text)
+        if progress_callback:
+            progress_callback(f"Detected {len(sections)} structured sections")
+        
+        # Count all section tokens in one batched tokenizer call
+        section_token_counts = self._tokens_of_many([section[0] for section in sections])
+        
+        chunk_texts = self._hierarchical_merge(sections, max_chunk_tokens, section_token_counts)
+        if progress_callback:
+            progress_callback(f"Hierarchical chunking done with {max_chunk_tokens} token limit")
+        return chunk_texts, len(sections)
+    
+    def _serializable_config(self) -> dict:
+        """Constructor arguments to rebuild an equivalent chunker in a worker process"""
+        return {
+            "chunk_size": self.chunk_size,
+            "delimiter": self.delimiter,
+            "overlap_percent": self.overlap_percent,
+            "pattern_set": self.pattern_set
+        }
+    
+    def _select_token_backend(self) -> Callable[[List[str]], List[int]]:
+        """Pick the many-texts token counter once, so hot paths carry no config branches"""
+        if not self.batch_token_counting:
+            token_counter = self._token_count
+            return lambda texts: [token_counter(text) for text in texts]
+        if self.token_cache_enabled:
+            return self._token_count.count_batch  # Cache hits + one batch call for misses
+        return token_count_batch
+    
     def _detect_sections(self, text: str) -> List[Tuple[str, str, int]]:
         """
         Detect sections with hierarchy levels
@@ -276,17 +358,33 @@ class HierarchicalChunker:
         Returns:
             List of (text, layout_type, level) tuples
         """
-        lines = text.split('\n')
+        detect = self._detect_hierarchy_level
         sections = []
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Detect hierarchy level
-            level, layout_type = self._detect_hierarchy_level(line)
-            sections.append((line, layout_type, level))
+        # Per-document memo: repeated lines (boilerplate, ToC entries) are classified once
+        classified_lines: Dict[str, Tuple[int, str]] = {}
+        
+        hash_bullet_match = self._hash_bullet_match
+        header_match = self._header_re.match
+        
+        # re.split alternates [body, header, body, header, ..., body]
+        parts = self._section_splitter.split(text)
+        for idx in range(0, len(parts), 2):
+            # Non-empty stripped lines via a C-level iterator chain
+            for line in filter(None, map(str.strip, parts[idx].splitlines())):
+                # Detect hierarchy level
+                classified = classified_lines.get(line)
+                if classified is None:
+                    classified = classified_lines[line] = detect(line)
+                level, layout_type = classified
+                sections.append((line, layout_type, level))
+            if idx + 1 < len(parts):
+                # Header lines skip detection: only a '#' bullet can outrank them
+                header = parts[idx + 1].strip()
+                m = hash_bullet_match(header) if hash_bullet_match else None
+                if m:
+                    sections.append((header, "bullet", self._group_levels[m.lastgroup]))
+                else:
+                    sections.append((header, "header", min(header_match(header).end() - 1, 2)))
         
         return sections
     
@@ -294,14 +392,18 @@ class HierarchicalChunker:
         """
         Detect hierarchy level of a line (OPTIMIZED with pattern caching)
         
+        Expects a non-empty, already stripped line (as produced by _detect_sections)
+        
         Returns:
             (level, layout_type) tuple
         """
         # PERFORMANCE BOOST: Use compiled patterns if enabled
         if self.pattern_cache_enabled and self._compiled_patterns:
-            for level, compiled_pattern in enumerate(self._compiled_patterns):
-                if compiled_pattern.match(line):
-                    return level, "bullet"
+            # Plain prose usually has no candidate and skips the regex engine
+            match_fn = self._bullet_matchers.get(line[0], self._bullet_fallback_match)
+            m = match_fn(line) if match_fn else None
+            if m:
+                return self._group_levels[m.lastgroup], "bullet"
         else:
             # Fallback to original method
             for level, pattern in enumerate(self.bullet_patterns):
@@ -309,27 +411,29 @@ class HierarchicalChunker:
                     return level, "bullet"
         
         # Check markdown headers
-        if line.startswith('#'):
-            header_level = len(line) - len(line.lstrip('#'))
-            return min(header_level - 1, 2), "header"
+        header_match = self._header_re.match(line) if line[0] == "#" else None
+        if header_match:
+            return min(header_match.end() - 1, 2), "header"
         
-        # Check if looks like title (short, capitalized)
+        # Check if looks like title (short, capitalized); O(1) checks first, then C-level scans
         if (len(line) < 100 and 
+            line[-1] != '.' and
             (line.isupper() or line.istitle()) and 
-            not line.endswith('.') and
-            not re.search(r'\d+', line)):
+            not self._has_digit(line)):
             return 1, "title"
         
         # Regular content
         return 3, "content"
     
-    def _hierarchical_merge(self, sections: List[Tuple[str, str, int]], max_tokens: int) -> List[str]:
+    def _hierarchical_merge(self, sections: List[Tuple[str, str, int]], max_tokens: int,
+                            token_counts: Optional[List[int]] = None) -> List[str]:
         """
         Optimized RAGFlow-inspired hierarchical merge for better token efficiency
         
         Args:
             sections: List of (text, layout_type, level) tuples
             max_tokens: Maximum tokens per chunk
+            token_counts: Precomputed token count per section (computed if omitted)
             
         Returns:
             List of chunk texts
@@ -337,8 +441,12 @@ class HierarchicalChunker:
         if not sections:
             return []
         
+        if token_counts is None:
+            token_counts = self._tokens_of_many([section[0] for section in sections])
+        
         chunks = []
-        current_chunk = ""
+        chunks_tokens = []  # Running token count recorded for each chunk
+        current_parts = []  # Joined with "\n" only when a chunk is finalized
         current_tokens = 0
         
         # Optimized thresholds for better efficiency
@@ -348,21 +456,27 @@ class HierarchicalChunker:
         
         def finalize_current_chunk():
             """Finalize and add current chunk with token-based overlap"""
-            nonlocal chunks, current_chunk, current_tokens
+            nonlocal chunks, chunks_tokens, current_parts, current_tokens
             
+            current_chunk = "\n".join(current_parts)
             if not current_chunk.strip():
                 return
             
             # Add current chunk to results
             chunks.append(current_chunk.strip())
+            chunks_tokens.append(current_tokens)
             
             # Generate token-based overlap for next chunk
             if overlap_tokens > 0:
-                overlap_text = get_token_overlap(current_chunk, overlap_tokens, self._token_count, from_end=True)
-                current_chunk = overlap_text
-                current_tokens = self._token_count(current_chunk)
+                # Suffix lookup (token count comes with it); keep at least the last word
+                overlap_text, overlap_count = ChunkOptimizer.get_suffix_with_tokens(current_chunk, overlap_tokens)
+                if not overlap_text:
+                    overlap_text = current_chunk.split()[-1]
+                    overlap_count = self._token_count(overlap_text)
+                current_parts = [overlap_text]
+                current_tokens = overlap_count
             else:
-                current_chunk = ""
+                current_parts = []
                 current_tokens = 0
         
         def should_start_new_chunk(text_tokens: int, level: int) -> bool:
@@ -378,8 +492,7 @@ class HierarchicalChunker:
             return would_exceed_target and meets_minimum
         
         # Process sections with optimized chunking strategy
-        for text, layout_type, level in sections:
-            text_tokens = self._token_count(text)
+        for (text, layout_type, level), text_tokens in zip(sections, token_counts):
             
             # Skip tiny content (unless it's important structure)
             if text_tokens < 5 and layout_type not in ["header", "title"]:
@@ -388,22 +501,23 @@ class HierarchicalChunker:
             # Handle oversized sections first
             if text_tokens > max_tokens:
                 # Finalize current chunk before handling large section
-                if current_chunk:
+                if current_parts:
                     finalize_current_chunk()
                 
                 # Split oversized section using RAGFlow method
                 split_parts = ragflow_smart_split(text, self.ragflow_delimiter_pattern, max_tokens, self._token_count)
                 
-                # Process split parts
-                for part in split_parts:
-                    part_tokens = self._token_count(part)
+                # Process split parts (counted in one batched call)
+                for part, part_tokens in zip(split_parts, self._tokens_of_many(split_parts)):
                     
                     if should_start_new_chunk(part_tokens, level):
                         finalize_current_chunk()
                     
                     # Add part to current chunk
-                    separator = "\n" if current_chunk and part else ""
-                    current_chunk += separator + part
+                    if part:
+                        if current_parts:
+                            current_tokens += self._newline_tokens
+                        current_parts.append(part)
                     current_tokens += part_tokens
                 
                 continue
@@ -413,54 +527,70 @@ class HierarchicalChunker:
                 finalize_current_chunk()
             
             # Add section to current chunk
-            separator = "\n" if current_chunk and text else ""
-            current_chunk += separator + text
+            if text:
+                if current_parts:
+                    current_tokens += self._newline_tokens
+                current_parts.append(text)
             current_tokens += text_tokens
         
         # Add final chunk
+        current_chunk = "\n".join(current_parts)
         if current_chunk.strip():
             chunks.append(current_chunk.strip())
+            chunks_tokens.append(current_tokens)
+        
+        # Post-processing: optimize small chunks (merge sizes from known counts)
+        near_limit_slack = 5  # Summed counts can drift by a token or two at the join
+        
+        def merged_tokens(prev: str, prev_tokens: int, chunk: str, chunk_tokens: int) -> int:
+            """Summed count of prev + "\n" + chunk, recounted exactly near max_tokens"""
+            merge_tokens = prev_tokens + self._newline_tokens + chunk_tokens
+            if abs(merge_tokens - max_tokens) <= near_limit_slack:
+                merge_tokens = self._token_count(prev + "\n" + chunk)
+            return merge_tokens
         
-        # Post-processing: optimize small chunks
         final_chunks = []
-        for chunk in chunks:
+        final_tokens = []
+        
+        for chunk, chunk_tokens in zip(chunks, chunks_tokens):
             if not chunk.strip():
                 continue
-                
-            chunk_tokens = self._token_count(chunk)
             
             # Handle oversized chunks (rare but possible)
             if chunk_tokens > max_tokens:
                 split_parts = force_split_large_text(chunk, max_tokens)
                 final_chunks.extend(split_parts)
+                final_tokens.extend(self._tokens_of_many(split_parts))
                 continue
             
             # Handle small chunks - try to merge with previous
             if (chunk_tokens < self.min_chunk_tokens and final_chunks and 
                 chunk_tokens > 5):  # Don't merge extremely tiny chunks
                 
-                test_merge = final_chunks[-1] + "\n" + chunk
-                merge_tokens = self._token_count(test_merge)
+                merge_tokens = merged_tokens(final_chunks[-1], final_tokens[-1], chunk, chunk_tokens)
                 
                 if merge_tokens <= max_tokens:
-                    final_chunks[-1] = test_merge
+                    final_chunks[-1] = final_chunks[-1] + "\n" + chunk
+                    final_tokens[-1] = merge_tokens
                     continue
             
             # Add chunk as-is
             final_chunks.append(chunk)
+            final_tokens.append(chunk_tokens)
         
         # Final filter: remove any remaining tiny chunks
         filtered_chunks = []
-        for chunk in final_chunks:
-            chunk_tokens = self._token_count(chunk)
-            
+        filtered_tokens = []
+        for chunk, chunk_tokens in zip(final_chunks, final_tokens):
             # Keep chunks that meet minimum or are the only chunk
             if chunk_tokens >= self.min_chunk_tokens or len(final_chunks) == 1:
                 filtered_chunks.append(chunk)
+                filtered_tokens.append(chunk_tokens)
             elif filtered_chunks:  # Try one more merge attempt
-                test_merge = filtered_chunks[-1] + "\n" + chunk
-                if self._token_count(test_merge) <= max_tokens:
-                    filtered_chunks[-1] = test_merge
+                merge_tokens = merged_tokens(filtered_chunks[-1], filtered_tokens[-1], chunk, chunk_tokens)
+                if merge_tokens <= max_tokens:
+                    filtered_chunks[-1] = filtered_chunks[-1] + "\n" + chunk
+                    filtered_tokens[-1] = merge_tokens
                 # Otherwise discard tiny chunk
         
         return filtered_chunks if filtered_chunks else final_chunks
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -30,16 +31,19 @@ class CacheSettings(BaseSettings):
     # Chunking performance cache (token counting optimization)
     token_cache_enabled: bool = Field(True)
     token_cache_max_size: int = Field(10000)
+    
+    # Chat assistant/session lookup cache
+    assistant_cache_max_size: int = Field(1024)
+    assistant_cache_ttl_seconds: int = Field(60)  # 1 minute
 
     class Config:
         env_prefix = "CACHE_"
         extra = "ignore"
 
 
-# Global settings instance
-cache_settings = CacheSettings()
-
+# Global settings instance (built once on first use)
+@lru_cache(maxsize=1)
 def get_cache_settings() -> CacheSettings:
     """Get cache configuration instance"""
-    return cache_settings
+    return CacheSettings()
 
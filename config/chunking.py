@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic import Field, ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -25,15 +26,8 @@ class ChunkingSettings(BaseSettings):
     enable_progress_callback: bool = Field(True)
 
 
-# Global settings instance
-_chunking_settings = None
-
-
+# Global settings instance (built once on first use)
+@lru_cache(maxsize=1)
 def get_chunking_settings() -> ChunkingSettings:
     """Get chunking settings with caching"""
-    global _chunking_settings
-    
-    if _chunking_settings is None:
-        _chunking_settings = ChunkingSettings()
-        
-    return _chunking_settings
+    return ChunkingSettings()
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -25,6 +26,9 @@ class DatabaseSettings(BaseSettings):
     pool_timeout: int = Field(30)           
     pool_size: int = Field(10)              
     max_overflow: int = Field(20)           
+    pool_recycle: int = Field(1800)         # Seconds before a pooled connection is replaced
+    insertmanyvalues_page_size: int = Field(500)  # Rows per round-trip for batched INSERTs
+    query_cache_size: int = Field(1200)     # Compiled-statement cache entries per engine
     
 
     @property
@@ -42,9 +46,8 @@ class DatabaseSettings(BaseSettings):
         extra = "ignore"  # Ignore non-DB env vars
 
 
-# Global config instance
-database_settings = DatabaseSettings()
-
+# Global config instance (built once on first use)
+@lru_cache(maxsize=1)
 def get_database_settings() -> DatabaseSettings:
     """Get database configuration instance"""
-    return database_settings
+    return DatabaseSettings()
@@ -1,3 +1,4 @@
+from functools import cached_property, lru_cache
 from typing import Dict, Any
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -13,14 +14,15 @@ class EmbeddingSettings(BaseSettings):
     embed_dimension: int = Field(1024, env="EMBED_VECTOR_DIM")
     
     
-    @property 
+    # Settings are read-only after load, so derived values are computed once per instance
+    @cached_property
     def api_keys_list(self) -> list[str]:
         """Parse comma-separated API keys into list"""
         if not self.embed_api_key:
             return []
         return [key.strip() for key in self.embed_api_key.split(",") if key.strip()]
     
-    @property
+    @cached_property
     def current_config(self) -> Dict[str, Any]:
         """Auto-detect provider based on model name and API key availability"""
         # Detect provider based on model name and API key
@@ -60,9 +62,8 @@ class EmbeddingSettings(BaseSettings):
         extra = "ignore"
 
 
-# Global settings instance
-embedding_settings = EmbeddingSettings()
-
+# Global settings instance (built once on first use)
+@lru_cache(maxsize=1)
 def get_embedding_settings() -> EmbeddingSettings:
     """Get embedding configuration instance"""
-    return embedding_settings
+    return EmbeddingSettings()
@@ -1,4 +1,5 @@
-from typing import Dict, List
+from functools import cached_property, lru_cache
+from typing import Dict, List, Tuple
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -13,9 +14,9 @@ class FileSettings(BaseSettings):
     min_content_length: int = Field(10)
     max_content_length: int = Field(1000000)
 
-    @property
+    @cached_property
     def max_file_size_bytes(self) -> int:
-        """Calculate max file size in bytes"""
+        """Calculate max file size in bytes (once per settings instance)"""
         return self.max_file_size_mb * 1024 * 1024
 
     class Config:
@@ -40,9 +41,8 @@ class FileConstants:
         """Check if file extension is supported"""
         if not filename:
             return False
-        # Use dynamic settings for extensions
-        settings = get_file_settings()
-        return any(filename.lower().endswith(ext) for ext in settings.supported_extensions)
+        # One C-level endswith over the cached lowercase suffix tuple
+        return filename.lower().endswith(_supported_suffixes())
     
     @classmethod
     def get_content_limits(cls) -> Dict[str, int]:
@@ -55,12 +55,14 @@ class FileConstants:
         }
 
 
-# Settings instance and getter
-_file_settings = None
-
+# Settings getter (lru_cache makes it a thread-safe singleton)
+@lru_cache(maxsize=1)
 def get_file_settings() -> FileSettings:
     """Get file settings singleton"""
-    global _file_settings
-    if _file_settings is None:
-        _file_settings = FileSettings()
-    return _file_settings
+    return FileSettings()
+
+
+@lru_cache(maxsize=1)
+def _supported_suffixes() -> Tuple[str, ...]:
+    """Lowercased supported extensions as a tuple for str.endswith"""
+    return tuple(ext.lower() for ext in get_file_settings().supported_extensions)
@@ -1,7 +1,19 @@
+from functools import lru_cache
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
 
+@lru_cache(maxsize=1)
+def _load_summary_prompt() -> str:
+    """Resolve the RAPTOR summary prompt once (deferred import)"""
+    try:
+        from prompts.llm import RAPTOR_SUMMARY_PROMPT
+        return RAPTOR_SUMMARY_PROMPT
+    except ImportError:
+        # Fallback if prompts module not available
+        return "Summarize the content below into a structured format with JSON output."
+
+
 class LLMSettings(BaseSettings):
     
     # FPT Cloud - Business configuration
@@ -25,21 +37,15 @@ class LLMSettings(BaseSettings):
     
     @property
     def summary_prompt(self) -> str:
-        try:
-            from prompts.llm import RAPTOR_SUMMARY_PROMPT
-            return RAPTOR_SUMMARY_PROMPT
-        except ImportError:
-            # Fallback if prompts module not available
-            return "Summarize the content below into a structured format with JSON output."
+        return _load_summary_prompt()
 
     class Config:
         env_prefix = "LLM_"
         extra = "ignore"  # Ignore non-LLM env vars
 
 
-# Global settings instance
-llm_settings = LLMSettings()
-
+# Global settings instance (built once on first use)
+@lru_cache(maxsize=1)
 def get_llm_settings() -> LLMSettings:
     """Get LLM configuration instance"""
-    return llm_settings
+    return LLMSettings()
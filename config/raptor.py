@@ -1,3 +1,4 @@
+from functools import lru_cache
 from dataclasses import dataclass
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -22,7 +23,7 @@ class RaptorSettings(BaseSettings):
         extra = "ignore"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RaptorPolicy:
     """Simplified policy for RAGFlow approach"""
     max_clusters: int
@@ -33,15 +34,15 @@ class RaptorPolicy:
     umap_metric: str
 
 
-# Global settings instance
-raptor_settings = RaptorSettings()
-
+# Global settings instance (built once on first use)
+@lru_cache(maxsize=1)
 def get_raptor_settings() -> RaptorSettings:
     """Get RAPTOR configuration instance"""
-    return raptor_settings
+    return RaptorSettings()
 
+@lru_cache(maxsize=1)
 def get_raptor_policy() -> RaptorPolicy:
-    """Get simplified RAPTOR policy from settings"""
+    """Get simplified RAPTOR policy from settings (frozen, built once)"""
     settings = get_raptor_settings()
     
     return RaptorPolicy(
@@ -1,31 +1,39 @@
-from pydantic import BaseModel, Field
+from dataclasses import dataclass, fields
+from functools import lru_cache
 from typing import Optional
 
 
-class RetrievalConfig(BaseModel):
+@dataclass(frozen=True, slots=True)
+class RetrievalConfig:
     
     # Similarity calculation weight (text_weight = 1.0 - vector_weight)
-    vector_similarity_weight: float = Field(0.95)
+    vector_similarity_weight: float = 0.95
     
     # Token estimation
-    tokens_per_word: float = Field(1.3)
+    tokens_per_word: float = 1.3
 
-    early_exit_threshold: float = Field(0.4)
+    early_exit_threshold: float = 0.4
+    
+    def __post_init__(self):
+        # Validate once at construction (all fields are floats); reads are plain slot loads
+        for field in fields(self):
+            object.__setattr__(self, field.name, float(getattr(self, field.name)))
 
 
-# Global retrieval configuration
-_retrieval_config: Optional[RetrievalConfig] = None
+# Custom configuration installed via set_retrieval_config (checked first)
+_retrieval_override: Optional[RetrievalConfig] = None
 
 
+@lru_cache(maxsize=1)
 def get_retrieval_config() -> RetrievalConfig:
     """Get retrieval configuration instance"""
-    global _retrieval_config
-    if _retrieval_config is None:
-        _retrieval_config = RetrievalConfig()
-    return _retrieval_config
+    if _retrieval_override is not None:
+        return _retrieval_override
+    return RetrievalConfig()
 
 
 def set_retrieval_config(config: RetrievalConfig):
     """Set custom retrieval configuration"""
-    global _retrieval_config
-    _retrieval_config = config
+    global _retrieval_override
+    _retrieval_override = config
+    get_retrieval_config.cache_clear()
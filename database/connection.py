@@ -1,4 +1,6 @@
-from typing import Optional
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
 
 # Ensure environment variables are loaded FIRST
 try:
@@ -8,12 +10,12 @@ except ImportError:
     pass
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from config.database import get_database_settings
 
-# Global session factory cache
-_session_factory_cache: Optional[async_sessionmaker[AsyncSession]] = None
+# Session factories keyed on resolved (database_url, enable_ssl, pool_pre_ping)
+_factory_cache: Dict[Tuple[str, bool, bool], async_sessionmaker[AsyncSession]] = {}
 
 
 def get_database_url() -> str:
@@ -22,86 +24,75 @@ def get_database_url() -> str:
     return db_config.database_url
 
 
+@lru_cache(maxsize=8)
+def _build_connect_args(
+    database_url: str,
+    enable_ssl: bool,
+    ssl_cert_path: Optional[str]
+) -> Tuple[Tuple[str, Any], ...]:
+    """Resolve psycopg connect_args once per (url, ssl, cert) - the cert probe is a stat() call"""
+    # SSL configuration for psycopg (like reference project)
+    connect_args = {}
+    if enable_ssl and "supabase" in database_url.lower():
+        # Verify against the root cert when present, otherwise SSL require without a certificate
+        connect_args = {"sslmode": "require"}
+        if ssl_cert_path:
+            cert_path = ssl_cert_path if os.path.isabs(ssl_cert_path) else os.path.join("database", ssl_cert_path)
+            if os.path.exists(cert_path):
+                connect_args = {
+                    "sslmode": "verify-full", 
+                    "sslrootcert": cert_path
+                }
+
+    # Add psycopg-compatible connection parameters for concurrent operations
+    connect_args.update({
+        "application_name": "raptor_service",
+        "prepare_threshold": None,  # Disable prepared statements to avoid conflicts in parallel uploads
+    })
+    # Immutable so the cached value cannot be mutated by callers
+    return tuple(connect_args.items())
+
+
 def get_session_factory(
     database_url: Optional[str] = None,
     enable_ssl: Optional[bool] = None,
     pool_pre_ping: bool = True
 ) -> async_sessionmaker[AsyncSession]:
 
-    global _session_factory_cache
-    
-    # Return cached factory if available and using default parameters
-    if (_session_factory_cache is not None and 
-        database_url is None and 
-        enable_ssl is None and 
-        pool_pre_ping is True):
-        return _session_factory_cache
-    
+    # Resolve defaults up front so equivalent calls share one cached factory (and engine pool)
     if not database_url:
         database_url = get_database_url()
 
     if enable_ssl is None:
         enable_ssl = get_database_settings().enable_ssl
 
-    # SSL configuration for psycopg (like reference project)
-    connect_args = {}
-    if enable_ssl and "supabase" in database_url.lower():
-        ssl_cert_path = get_database_settings().ssl_cert_path
-        
-        try:
-            # Method 1: Use psycopg SSL parameters (like reference project)
-            if ssl_cert_path:
-                import os
-                cert_path = ssl_cert_path if os.path.isabs(ssl_cert_path) else os.path.join("database", ssl_cert_path)
-                
-                if os.path.exists(cert_path):
-                    connect_args = {
-                        "sslmode": "verify-full", 
-                        "sslrootcert": cert_path
-                    }
-                else:
-                    # Fallback to require mode without certificate
-                    connect_args = {"sslmode": "require"}
-            else:
-                # SSL require without specific certificate
-                connect_args = {"sslmode": "require"}
-                
-        except Exception:
-            try:
-                # Basic SSL requirement
-                connect_args = {"sslmode": "require"}
-            except Exception:
-                # Disable SSL as last resort
-                connect_args = {}
+    cache_key = (database_url, enable_ssl, pool_pre_ping)
+    cached_factory = _factory_cache.get(cache_key)
+    if cached_factory is not None:
+        return cached_factory
 
-    # Add psycopg-compatible connection parameters for concurrent operations
-    connect_args.update({
-        "application_name": "raptor_service",
-        "prepare_threshold": None,  # Disable prepared statements to avoid conflicts in parallel uploads
-    })
+    db_config = get_database_settings()
+    connect_args = dict(_build_connect_args(database_url, enable_ssl, db_config.ssl_cert_path))
 
-    # Create async engine with NullPool for async compatibility
-    try:
-        engine = create_async_engine(
-            database_url,
-            pool_pre_ping=pool_pre_ping,
-            poolclass=NullPool,    # NullPool is asyncio-compatible
-            echo=False,  # Disable SQL echo to avoid issues
-            connect_args=connect_args
-        )
-        
-        session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
-        
-        # Cache the factory if using default parameters
-        if (database_url == get_database_url() and 
-            enable_ssl == get_database_settings().enable_ssl and 
-            pool_pre_ping is True):
-            _session_factory_cache = session_factory
-            
-        return session_factory
-        
-    except Exception:
-        raise
+    # Create async engine with a connection pool so TCP/TLS/auth setup is reused across requests
+    engine = create_async_engine(
+        database_url,
+        pool_pre_ping=pool_pre_ping,
+        poolclass=AsyncAdaptedQueuePool,    # asyncio-safe QueuePool
+        pool_size=db_config.pool_size,
+        max_overflow=db_config.max_overflow,
+        pool_timeout=db_config.pool_timeout,
+        pool_recycle=db_config.pool_recycle,
+        insertmanyvalues_page_size=db_config.insertmanyvalues_page_size,  # Bounds bulk upsert statement size
+        query_cache_size=db_config.query_cache_size,
+        echo=False,  # Disable SQL echo to avoid issues
+        connect_args=connect_args
+    )
+    
+    session_factory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    
+    _factory_cache[cache_key] = session_factory
+    return session_factory
 
 
 def get_cached_session_factory() -> async_sessionmaker[AsyncSession]:
@@ -109,9 +100,4 @@ def get_cached_session_factory() -> async_sessionmaker[AsyncSession]:
     Get the cached session factory, creating it if it doesn't exist.
     This is the preferred method for normal operations to maximize performance.
     """
-    global _session_factory_cache
-    
-    if _session_factory_cache is None:
-        _session_factory_cache = get_session_factory()
-    
-    return _session_factory_cache
+    return get_session_factory()
@@ -1,10 +1,17 @@
-from .base import BaseRepository
-from .document_repository import DocumentRepository, ChunkRepository
+from importlib import import_module
 
-from .embedding_repository import EmbeddingRepository
-from .knowledge_base_repository import KnowledgeBaseRepository, ChatSessionRepository
-from .assistant_repository import AssistantRepository
-from .message_repository import MessageRepository
+# Repository classes are imported on first access (PEP 562) so importing the
+# package does not pull in every ORM model up front
+_REPOSITORY_MODULES = {
+    "BaseRepository": ".base",
+    "DocumentRepository": ".document_repository",
+    "ChunkRepository": ".document_repository",
+    "EmbeddingRepository": ".embedding_repository",
+    "KnowledgeBaseRepository": ".knowledge_base_repository",
+    "ChatSessionRepository": ".knowledge_base_repository",
+    "AssistantRepository": ".assistant_repository",
+    "MessageRepository": ".message_repository",
+}
 
 __all__ = [
     "BaseRepository",
@@ -16,3 +23,16 @@ __all__ = [
     "AssistantRepository",
     "MessageRepository"
 ]
+
+
+def __getattr__(name: str):
+    module_name = _REPOSITORY_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,7 +1,7 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func
+from sqlalchemy.orm import joinedload
 
 from .base import BaseRepository
 from models.database.assistant import AssistantORM
@@ -10,6 +10,8 @@ from models.database.assistant import AssistantORM
 class AssistantRepository(BaseRepository[AssistantORM]):
     """Repository for AI Assistant management"""
     
+    __slots__ = ()
+    
     def __init__(self, session: AsyncSession):
         super().__init__(session, AssistantORM)
     
@@ -76,7 +78,7 @@ class AssistantRepository(BaseRepository[AssistantORM]):
         try:
             stmt = (
                 select(AssistantORM)
-                .options(selectinload(AssistantORM.knowledge_base))
+                .options(joinedload(AssistantORM.knowledge_base))  # Single-row fetch: one JOINed query
                 .where(AssistantORM.assistant_id == assistant_id)
             )
             result = await self.session.execute(stmt)
@@ -107,19 +109,20 @@ class AssistantRepository(BaseRepository[AssistantORM]):
             if not assistant:
                 return None
                 
-            # Count chat sessions for this assistant
+            # Count chat sessions and messages for this assistant in one aggregate row
             from models.database.knowledge_base import ChatSessionORM
-            stmt = select(ChatSessionORM).where(ChatSessionORM.assistant_id == assistant_id)
+            stmt = select(
+                func.count(),
+                func.coalesce(func.sum(ChatSessionORM.message_count), 0)
+            ).where(ChatSessionORM.assistant_id == assistant_id)
             result = await self.session.execute(stmt)
-            sessions = result.scalars().all()
-            
-            total_messages = sum(session.message_count for session in sessions)
+            total_sessions, total_messages = result.one()
             
             return {
                 "assistant_id": assistant.assistant_id,
                 "name": assistant.name,
                 "kb_name": assistant.knowledge_base.name if assistant.knowledge_base else None,
-                "total_sessions": len(sessions),
+                "total_sessions": total_sessions,
                 "total_messages": total_messages,
                 "created_at": assistant.created_at,
                 "last_updated": assistant.updated_at
@@ -135,6 +138,7 @@ class AssistantRepository(BaseRepository[AssistantORM]):
     ) -> List[AssistantORM]:
         """Search assistants by name or description"""
         try:
+            # Substring ILIKE is served by the pg_trgm GIN indexes on name/description
             stmt = (
                 select(AssistantORM)
                 .where(
@@ -1,6 +1,7 @@
-from typing import TypeVar, Generic, Type, Optional, List, Dict, Any
+from functools import lru_cache
+from typing import TypeVar, Generic, Type, Optional, List, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update
+from sqlalchemy import select, insert, delete, update, literal, inspect, bindparam, func
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from models.database.base import Base
@@ -8,20 +9,59 @@ from models.database.base import Base
 ModelType = TypeVar("ModelType", bound=Base)
 
 
+@lru_cache(maxsize=None)
+def _column_attrs(model: Type[Base]) -> Dict[str, Any]:
+    """Mapped column attributes by key, resolved once per model class"""
+    return {attr.key: getattr(model, attr.key) for attr in model.__mapper__.column_attrs}
+
+
+# Statements keyed on (model, kind[, ((column, is_null), ...)]); values are bound per call
+_stmt_cache: Dict[tuple, Any] = {}
+
+
 class BaseRepository(Generic[ModelType]):
     """Base repository with common CRUD operations"""
     
+    # Created per session: no per-instance __dict__
+    __slots__ = ("session", "model", "_pk_col", "_attrs")
+    
     def __init__(self, session: AsyncSession, model: Type[ModelType]):
         self.session = session
         self.model = model
+        # Primary key column resolved once (first column of the table's PK)
+        self._pk_col = next(iter(model.__table__.primary_key.columns))
+        # Filterable columns: one dict lookup per filter instead of hasattr + getattr
+        self._attrs = _column_attrs(model)
     
-    async def create(self, **kwargs) -> ModelType:
-        """Create a new record"""
+    def _filtered_stmt(self, kind: str, build, filters: Dict[str, Any]) -> Tuple[Any, Dict[str, Any]]:
+        """Cached statement with one bindparam per filter that names a mapped column, plus its params"""
+        params = {key: value for key, value in filters.items() if key in self._attrs}
+        # None filters render as IS NULL, so null-ness is part of the statement shape
+        shape = tuple(sorted((key, value is None) for key, value in params.items()))
+        cache_key = (self.model, kind, shape)
+        stmt = _stmt_cache.get(cache_key)
+        if stmt is None:
+            stmt = build()
+            for key, is_null in shape:
+                column = self._attrs[key]
+                stmt = stmt.where(column.is_(None) if is_null else column == bindparam(key))
+            _stmt_cache[cache_key] = stmt
+        return stmt, {key: value for key, value in params.items() if value is not None}
+    
+    async def create(self, *, refresh: bool = False, **kwargs) -> ModelType:
+        """Create a new record (refresh=True forces a full reload after the INSERT)"""
         try:
             obj = self.model(**kwargs)
             self.session.add(obj)
             await self.session.flush()
-            await self.session.refresh(obj)
+            if refresh:
+                await self.session.refresh(obj)
+            else:
+                # Server defaults already came back via INSERT ... RETURNING; only
+                # re-SELECT columns the flush left unloaded (omitted nullables, onupdate)
+                unloaded = inspect(obj).unloaded & self._attrs.keys()
+                if unloaded:
+                    await self.session.refresh(obj, attribute_names=list(unloaded))
             return obj
         except IntegrityError as e:
             await self.session.rollback()
@@ -30,26 +70,35 @@ class BaseRepository(Generic[ModelType]):
     async def get_by_id(self, id_value: Any) -> Optional[ModelType]:
         """Get record by primary key"""
         try:
-            stmt = select(self.model).where(
-                list(self.model.__table__.primary_key.columns)[0] == id_value
-            )
-            result = await self.session.execute(stmt)
-            return result.scalar_one_or_none()
+            # Session identity map acts as the per-request cache: repeat lookups of
+            # an already loaded row skip the SELECT
+            return await self.session.get(self.model, id_value)
         except SQLAlchemyError as e:
             raise ValueError(f"Failed to get record: {str(e)}")
     
+    async def get_many_by_ids(self, ids: List[Any]) -> Dict[Any, ModelType]:
+        """Get records by primary key in one query, keyed by primary key (missing ids are absent)"""
+        try:
+            if not ids:
+                return {}
+            stmt = select(self.model).where(self._pk_col.in_(set(ids)))
+            result = await self.session.execute(stmt)
+            pk_key = self._pk_col.key
+            return {getattr(row, pk_key): row for row in result.scalars()}
+        except SQLAlchemyError as e:
+            raise ValueError(f"Failed to get records: {str(e)}")
+    
     async def get_many(self, limit: int = 100, offset: int = 0, **filters) -> List[ModelType]:
         """Get multiple records with optional filters"""
         try:
-            stmt = select(self.model)
-            
-            # Apply filters
-            for key, value in filters.items():
-                if hasattr(self.model, key):
-                    stmt = stmt.where(getattr(self.model, key) == value)
-            
-            stmt = stmt.limit(limit).offset(offset)
-            result = await self.session.execute(stmt)
+            stmt, params = self._filtered_stmt(
+                "get_many",
+                lambda: select(self.model).limit(bindparam("_limit")).offset(bindparam("_offset")),
+                filters
+            )
+            params["_limit"] = limit
+            params["_offset"] = offset
+            result = await self.session.execute(stmt, params)
             return list(result.scalars().all())
         except SQLAlchemyError as e:
             raise ValueError(f"Failed to get records: {str(e)}")
@@ -57,12 +106,16 @@ class BaseRepository(Generic[ModelType]):
     async def update_by_id(self, id_value: Any, **kwargs) -> Optional[ModelType]:
         """Update record by primary key"""
         try:
-            primary_key = list(self.model.__table__.primary_key.columns)[0]
-            stmt = update(self.model).where(primary_key == id_value).values(**kwargs)
-            await self.session.execute(stmt)
-            
-            # Return updated record
-            return await self.get_by_id(id_value)
+            # Updated row comes back from UPDATE ... RETURNING instead of a follow-up SELECT
+            stmt = (
+                update(self.model)
+                .where(self._pk_col == id_value)
+                .values(**kwargs)
+                .returning(self.model)
+                .execution_options(synchronize_session=False, populate_existing=True)
+            )
+            result = await self.session.execute(stmt)
+            return result.scalar_one_or_none()
         except SQLAlchemyError as e:
             await self.session.rollback()
             raise ValueError(f"Failed to update record: {str(e)}")
@@ -70,9 +123,11 @@ class BaseRepository(Generic[ModelType]):
     async def delete_by_id(self, id_value: Any) -> bool:
         """Delete record by primary key"""
         try:
-            primary_key = list(self.model.__table__.primary_key.columns)[0]
-            stmt = delete(self.model).where(primary_key == id_value)
-            result = await self.session.execute(stmt)
+            stmt = _stmt_cache.get((self.model, "delete_by_id"))
+            if stmt is None:
+                stmt = delete(self.model).where(self._pk_col == bindparam("pk"))
+                _stmt_cache[(self.model, "delete_by_id")] = stmt
+            result = await self.session.execute(stmt, {"pk": id_value})
             return result.rowcount > 0
         except SQLAlchemyError as e:
             await self.session.rollback()
@@ -81,15 +136,10 @@ class BaseRepository(Generic[ModelType]):
     async def count(self, **filters) -> int:
         """Count records with optional filters"""
         try:
-            from sqlalchemy import func
-            stmt = select(func.count()).select_from(self.model)
-            
-            # Apply filters
-            for key, value in filters.items():
-                if hasattr(self.model, key):
-                    stmt = stmt.where(getattr(self.model, key) == value)
-            
-            result = await self.session.execute(stmt)
+            stmt, params = self._filtered_stmt(
+                "count", lambda: select(func.count()).select_from(self.model), filters
+            )
+            result = await self.session.execute(stmt, params)
             return result.scalar() or 0
         except SQLAlchemyError as e:
             raise ValueError(f"Failed to count records: {str(e)}")
@@ -97,13 +147,11 @@ class BaseRepository(Generic[ModelType]):
     async def exists(self, **filters) -> bool:
         """Check if record exists with filters"""
         try:
-            stmt = select(self.model)
-            for key, value in filters.items():
-                if hasattr(self.model, key):
-                    stmt = stmt.where(getattr(self.model, key) == value)
-            
-            stmt = stmt.limit(1)
-            result = await self.session.execute(stmt)
+            # SELECT 1 ... LIMIT 1: no column list, no ORM row hydration
+            stmt, params = self._filtered_stmt(
+                "exists", lambda: select(literal(1)).select_from(self.model).limit(1), filters
+            )
+            result = await self.session.execute(stmt, params)
             return result.first() is not None
         except SQLAlchemyError as e:
             raise ValueError(f"Failed to check existence: {str(e)}")
@@ -111,30 +159,22 @@ class BaseRepository(Generic[ModelType]):
     async def bulk_create(self, records: List[Dict[str, Any]], skip_refresh: bool = False) -> List[ModelType]:
         """Bulk create records"""
         try:
-            objects = [self.model(**record) for record in records]
-            self.session.add_all(objects)
-            await self.session.flush()
+            if not records:
+                return []
             
             # ✅ Skip refresh for embeddings (they have pre-defined IDs)
             if skip_refresh:
+                objects = [self.model(**record) for record in records]
+                self.session.add_all(objects)
+                await self.session.flush()
                 return objects
             
-            # Refresh all objects to get generated IDs (with concurrency handling)
-            refreshed_objects = []
-            for obj in objects:
-                try:
-                    await self.session.refresh(obj)
-                    refreshed_objects.append(obj)
-                except Exception as refresh_error:
-                    # Handle prepared statement conflicts in concurrent uploads
-                    if "DuplicatePreparedStatement" in str(refresh_error) or "already exists" in str(refresh_error):
-                        # Object was created successfully, just use it as-is
-                        refreshed_objects.append(obj)
-                    else:
-                        # Re-raise other refresh errors
-                        raise refresh_error
-            
-            return refreshed_objects
+            # Generated IDs/defaults come back from a single INSERT ... RETURNING
+            # instead of one refresh SELECT per row; rows come back in input order
+            result = await self.session.scalars(
+                insert(self.model).returning(self.model, sort_by_parameter_order=True), records
+            )
+            return list(result.all())
         except IntegrityError as e:
             await self.session.rollback()
             raise ValueError(f"Bulk creation failed: {str(e)}")
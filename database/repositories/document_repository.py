@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 from sqlalchemy.dialects.postgresql import insert
 
@@ -11,18 +11,22 @@ from models.database.document import DocumentORM, ChunkORM
 class DocumentRepository(BaseRepository[DocumentORM]):
     """Repository for document and chunk operations"""
     
+    __slots__ = ()
+    
     def __init__(self, session: AsyncSession):
         super().__init__(session, DocumentORM)
     
     async def create_document_with_chunks(
         self, 
         doc_data: Dict[str, Any], 
-        chunks_data: List[Dict[str, Any]]
+        chunks_data: List[Dict[str, Any]],
+        return_chunks: bool = False
     ) -> DocumentORM:
-        """Create document with associated chunks in single transaction"""
+        """Create document with associated chunks in single transaction (return_chunks=True reloads document.chunks)"""
         try:
-            # Create document
-            document = await self.create(**doc_data)
+            # Create document (doc_id is client-generated, so no flush is needed to learn it)
+            document = DocumentORM(**doc_data)
+            self.session.add(document)
             
             # Add doc_id to all chunks
             for chunk_data in chunks_data:
@@ -30,12 +34,15 @@ class DocumentRepository(BaseRepository[DocumentORM]):
             
             # Create chunks
             if chunks_data:
-                chunk_objects = [ChunkORM(**chunk_data) for chunk_data in chunks_data]
-                self.session.add_all(chunk_objects)
-                await self.session.flush()
+                self.session.add_all([ChunkORM(**chunk_data) for chunk_data in chunks_data])
+            
+            # One flush for document + chunks (unit of work inserts the document first)
+            await self.session.flush()
             
-            # Reload document with chunks
-            return await self.get_document_with_chunks(document.doc_id)
+            # Reload document with chunks only when the caller needs them
+            if return_chunks:
+                return await self.get_document_with_chunks(document.doc_id)
+            return document
             
         except Exception as e:
             await self.session.rollback()
@@ -72,6 +79,23 @@ class DocumentRepository(BaseRepository[DocumentORM]):
         except Exception as e:
             raise ValueError(f"Failed to find document by checksum: {str(e)}")
     
+    async def find_doc_id_by_checksum(
+        self, 
+        tenant_id: str, 
+        kb_id: str, 
+        checksum: str
+    ) -> Optional[str]:
+        """Duplicate check by checksum: selects only doc_id, no ORM row hydration"""
+        try:
+            stmt = select(DocumentORM.doc_id).where(
+                DocumentORM.tenant_id == tenant_id,
+                DocumentORM.kb_id == kb_id,
+                DocumentORM.checksum == checksum
+            ).limit(1)
+            return await self.session.scalar(stmt)
+        except Exception as e:
+            raise ValueError(f"Failed to find document by checksum: {str(e)}")
+    
     async def find_by_filename(
         self, 
         tenant_id: str, 
@@ -122,6 +146,8 @@ class DocumentRepository(BaseRepository[DocumentORM]):
 class ChunkRepository(BaseRepository[ChunkORM]):
     """Repository for chunk-specific operations"""
     
+    __slots__ = ()
+    
     def __init__(self, session: AsyncSession):
         super().__init__(session, ChunkORM)
     
@@ -142,13 +168,33 @@ class ChunkRepository(BaseRepository[ChunkORM]):
         except Exception as e:
             raise ValueError(f"Failed to get chunks by document: {str(e)}")
     
+    async def count_chunks_by_doc_ids(self, doc_ids: List[str]) -> Dict[str, int]:
+        """Count chunks for several documents in one grouped query (0 for documents without chunks)"""
+        try:
+            counts: Dict[str, int] = dict.fromkeys(doc_ids, 0)
+            if not doc_ids:
+                return counts
+            stmt = (
+                select(ChunkORM.doc_id, func.count())
+                .where(ChunkORM.doc_id.in_(doc_ids))
+                .group_by(ChunkORM.doc_id)
+            )
+            result = await self.session.execute(stmt)
+            for doc_id, chunk_count in result:
+                counts[doc_id] = chunk_count
+            return counts
+        except Exception as e:
+            raise ValueError(f"Failed to count chunks by documents: {str(e)}")
+    
     async def bulk_upsert_chunks(self, chunks_data: List[Dict[str, Any]]) -> int:
         """Bulk upsert chunks with conflict resolution"""
         try:
             if not chunks_data:
                 return 0
             
-            stmt = insert(ChunkORM).values(chunks_data)
+            # Rows go as parameters (not .values()) so SQLAlchemy batches them into
+            # pages of insertmanyvalues_page_size instead of one giant statement
+            stmt = insert(ChunkORM)
             stmt = stmt.on_conflict_do_update(
                 index_elements=[ChunkORM.chunk_id],
                 set_={
@@ -159,7 +205,7 @@ class ChunkRepository(BaseRepository[ChunkORM]):
                     "doc_id": stmt.excluded.doc_id,
                 }
             )
-            result = await self.session.execute(stmt)
+            await self.session.execute(stmt, chunks_data)
             return len(chunks_data)
         except Exception as e:
             await self.session.rollback()
@@ -185,16 +231,23 @@ class ChunkRepository(BaseRepository[ChunkORM]):
         query: str,
         limit: int = 10
     ) -> List[ChunkORM]:
-        """Simple text search in chunk content (can be enhanced with full-text search later)"""
+        """Full-text search in chunk content (GIN-indexed tsvector), best matches first
+        
+        Matches whole words, not substrings: every word of the query must appear in the
+        chunk as a complete word (any order, case-insensitive, 'simple' config so no
+        stemming). Prefixes and infixes such as "embed" for "embedding" do not match.
+        """
         try:
+            ts_query = func.plainto_tsquery('simple', query)
             stmt = (
                 select(ChunkORM)
                 .join(ChunkORM.document)
                 .where(
                     DocumentORM.tenant_id == tenant_id,
                     DocumentORM.kb_id == kb_id,
-                    ChunkORM.content.ilike(f"%{query}%")
+                    ChunkORM.content_tsv.op('@@')(ts_query)
                 )
+                .order_by(func.ts_rank_cd(ChunkORM.content_tsv, ts_query).desc())
                 .limit(limit)
             )
             result = await self.session.execute(stmt)
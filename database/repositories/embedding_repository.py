@@ -1,15 +1,27 @@
+import json
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, text
+from sqlalchemy.orm import defer
 from sqlalchemy.dialects.postgresql import insert
 
 from .base import BaseRepository
 from models.database.embedding import EmbeddingORM, EmbeddingOwnerType
 
+# Above this many rows bulk_upsert_embeddings stages through COPY instead of batched INSERTs.
+# 2000 is the cut-over from the bulk-load guidance this path follows, not a local benchmark:
+# at the default insertmanyvalues_page_size (500) it is four INSERT pages, below which the
+# temp table, TRUNCATE and extra INSERT ... SELECT round-trips cost more than COPY saves
+COPY_UPSERT_THRESHOLD = 2000
+
+_COPY_COLUMNS = ("id", "tenant_id", "kb_id", "owner_type", "owner_id", "model", "dimension", "vector", "meta")
+
 
 class EmbeddingRepository(BaseRepository[EmbeddingORM]):
     """Repository for vector embeddings with pgvector support"""
     
+    __slots__ = ()
+    
     def __init__(self, session: AsyncSession):
         super().__init__(session, EmbeddingORM)
     
@@ -38,10 +50,10 @@ class EmbeddingRepository(BaseRepository[EmbeddingORM]):
             if len(owner_ids) != len(vectors):
                 raise ValueError("owner_ids and vectors must have same length")
             
-            # Validate vector dimensions
-            for i, vector in enumerate(vectors):
-                if len(vector) != dimension:
-                    raise ValueError(f"Vector {i} has dimension {len(vector)}, expected {dimension}")
+            # Validate vector dimensions: one C-level map(len) pass, index lookup only on failure
+            if any(length != dimension for length in set(map(len, vectors))):
+                i, vector = next((i, v) for i, v in enumerate(vectors) if len(v) != dimension)
+                raise ValueError(f"Vector {i} has dimension {len(vector)}, expected {dimension}")
             
             # Prepare embedding data
             embeddings_data = []
@@ -71,7 +83,12 @@ class EmbeddingRepository(BaseRepository[EmbeddingORM]):
             if not embeddings_data:
                 return []
             
-            stmt = insert(EmbeddingORM).values(embeddings_data)
+            if len(embeddings_data) > COPY_UPSERT_THRESHOLD:
+                return await self._copy_upsert_embeddings(embeddings_data)
+            
+            # Rows go as parameters (not .values()) so SQLAlchemy batches them into
+            # pages of insertmanyvalues_page_size instead of one giant statement
+            stmt = insert(EmbeddingORM)
             stmt = stmt.on_conflict_do_update(
                 index_elements=[EmbeddingORM.id],
                 set_={
@@ -81,17 +98,61 @@ class EmbeddingRepository(BaseRepository[EmbeddingORM]):
                     "meta": stmt.excluded.meta,
                 }
             )
-            await self.session.execute(stmt)
-            
-            # Return created/updated embeddings
-            embedding_ids = [emb["id"] for emb in embeddings_data]
-            stmt = select(EmbeddingORM).where(EmbeddingORM.id.in_(embedding_ids))
-            result = await self.session.execute(stmt)
-            return list(result.scalars().all())
+            # Created/updated rows come back from the upsert itself (no follow-up SELECT);
+            # populate_existing overwrites stale identity-map copies of updated rows
+            result = await self.session.scalars(
+                stmt.returning(EmbeddingORM),
+                embeddings_data,
+                execution_options={"populate_existing": True}
+            )
+            return list(result.all())
         except Exception as e:
             await self.session.rollback()
             raise ValueError(f"Failed to bulk upsert embeddings: {str(e)}")
     
+    async def _copy_upsert_embeddings(self, embeddings_data: List[Dict[str, Any]]) -> List[EmbeddingORM]:
+        """Upsert a large batch via COPY into a temp staging table, then one INSERT ... SELECT ... ON CONFLICT"""
+        columns = ", ".join(_COPY_COLUMNS)
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection  # psycopg AsyncConnection
+        
+        async with driver_connection.cursor() as cursor:
+            await cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS _embeddings_stage "
+                "(LIKE embeddings INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            await cursor.execute("TRUNCATE _embeddings_stage")
+            # COPY text format: vectors as pgvector literals, meta as JSON text
+            async with cursor.copy(f"COPY _embeddings_stage ({columns}) FROM STDIN") as copy:
+                for emb in embeddings_data:
+                    owner_type = emb["owner_type"]
+                    await copy.write_row((
+                        emb["id"],
+                        emb["tenant_id"],
+                        emb["kb_id"],
+                        owner_type.name if isinstance(owner_type, EmbeddingOwnerType) else owner_type,  # SAEnum stores member names
+                        emb["owner_id"],
+                        emb["model"],
+                        emb["dimension"],
+                        "[" + ",".join(map(str, emb["vector"])) + "]",
+                        json.dumps(emb.get("meta") or {})
+                    ))
+        
+        stmt = text(
+            f"INSERT INTO embeddings ({columns}) "
+            f"SELECT {columns} FROM _embeddings_stage "
+            "ON CONFLICT (id) DO UPDATE SET "
+            "vector = EXCLUDED.vector, model = EXCLUDED.model, "
+            "dimension = EXCLUDED.dimension, meta = EXCLUDED.meta "
+            "RETURNING embeddings.*"
+        )
+        result = await self.session.scalars(
+            select(EmbeddingORM).from_statement(stmt),
+            execution_options={"populate_existing": True}
+        )
+        return list(result.all())
+    
     async def similarity_search(
         self,
         query_vector: List[float],
@@ -106,28 +167,28 @@ class EmbeddingRepository(BaseRepository[EmbeddingORM]):
             from sqlalchemy.sql import select as sql_select
             
             # pgvector expects the vector as a list/array directly, not a string
+            # One distance expression (and one bound query vector) shared by SELECT, WHERE and ORDER BY
+            distance = EmbeddingORM.vector.cosine_distance(query_vector)
             
             # Build SQLAlchemy query 
             stmt = sql_select(
                 EmbeddingORM,
-                (1 - EmbeddingORM.vector.cosine_distance(query_vector)).label('similarity')
+                (1 - distance).label('similarity')
             ).where(
                 EmbeddingORM.tenant_id == tenant_id,
                 EmbeddingORM.kb_id == kb_id
-            )
+            ).options(defer(EmbeddingORM.vector))  # Hits carry score + metadata, not the stored vector
             
             # Add owner type filter if specified
             if owner_type:
                 stmt = stmt.where(EmbeddingORM.owner_type == owner_type)
             
-            # Add similarity threshold
+            # Add similarity threshold (as a bound on raw distance: similarity >= t <=> distance <= 1 - t)
             if similarity_threshold > 0:
-                stmt = stmt.where(
-                    (1 - EmbeddingORM.vector.cosine_distance(query_vector)) >= similarity_threshold
-                )
+                stmt = stmt.where(distance <= 1 - similarity_threshold)
             
-            # Add ordering and limit
-            stmt = stmt.order_by(EmbeddingORM.vector.cosine_distance(query_vector)).limit(limit)
+            # Order by ascending distance so the HNSW/IVFFlat vector_cosine_ops index can serve it
+            stmt = stmt.order_by(distance).limit(limit)
             
             # Execute query
             result = await self.session.execute(stmt)
@@ -201,15 +262,27 @@ class EmbeddingRepository(BaseRepository[EmbeddingORM]):
         kb_id: str,
         vector_weight: float = 0.7,
         text_weight: float = 0.3,
-        limit: int = 10
+        limit: int = 10,
+        ann_k: Optional[int] = None
     ) -> List[Tuple[EmbeddingORM, float]]:
-        """Hybrid search combining vector similarity and text matching"""
+        """Hybrid search: top ann_k (default 10 x limit) vector candidates re-scored with a text-match bonus"""
         try:
             from sqlalchemy import case
             from sqlalchemy.sql import select as sql_select
             
-            # Calculate vector similarity (pass query_vector as list directly)
-            vector_sim = 1 - EmbeddingORM.vector.cosine_distance(query_vector)
+            # Candidate set from the vector index first (pass query_vector as list directly),
+            # so distance and text match are only evaluated on a bounded set of rows
+            distance = EmbeddingORM.vector.cosine_distance(query_vector)
+            candidates = sql_select(
+                EmbeddingORM.id.label('candidate_id'),
+                distance.label('distance')
+            ).where(
+                EmbeddingORM.tenant_id == tenant_id,
+                EmbeddingORM.kb_id == kb_id
+            ).order_by(distance).limit(ann_k or limit * 10).cte('candidates')
+            
+            # Calculate vector similarity
+            vector_sim = 1 - candidates.c.distance
             
             # Calculate text match (simplified - can be enhanced with full-text search)
             text_match = case(
@@ -224,9 +297,10 @@ class EmbeddingRepository(BaseRepository[EmbeddingORM]):
             stmt = sql_select(
                 EmbeddingORM,
                 hybrid_score
-            ).where(
-                EmbeddingORM.tenant_id == tenant_id,
-                EmbeddingORM.kb_id == kb_id
+            ).join(
+                candidates, EmbeddingORM.id == candidates.c.candidate_id
+            ).options(
+                defer(EmbeddingORM.vector)  # Hits carry score + metadata, not the stored vector
             ).order_by(hybrid_score.desc()).limit(limit)
             
             # Execute query
@@ -9,6 +9,8 @@ from utils.kb_settings import get_default_kb_settings
 class KnowledgeBaseRepository(BaseRepository[KnowledgeBaseORM]):
     """Repository for Knowledge Base management"""
     
+    __slots__ = ()
+    
     def __init__(self, session: AsyncSession):
         super().__init__(session, KnowledgeBaseORM)
     
@@ -124,6 +126,8 @@ class KnowledgeBaseRepository(BaseRepository[KnowledgeBaseORM]):
 class ChatSessionRepository(BaseRepository[ChatSessionORM]):
     """Repository for chat session management"""
     
+    __slots__ = ()
+    
     def __init__(self, session: AsyncSession):
         super().__init__(session, ChatSessionORM)
     
@@ -171,7 +175,12 @@ class ChatSessionRepository(BaseRepository[ChatSessionORM]):
         """Get all chat sessions for a specific knowledge base"""
         return await self.get_many(kb_id=kb_id)
     
-    async def increment_message_count(self, session_id: str, count: int = 1) -> Optional[ChatSessionORM]:
+    async def increment_message_count(
+        self,
+        session_id: str,
+        count: int = 1,
+        return_session: bool = True
+    ) -> Optional[ChatSessionORM]:
         """Increment message count and update last active"""
         try:
             stmt = update(ChatSessionORM).where(
@@ -181,6 +190,8 @@ class ChatSessionRepository(BaseRepository[ChatSessionORM]):
                 last_active=func.now()
             )
             await self.session.execute(stmt)
+            if not return_session:
+                return None
             return await self.get_by_id(session_id)
         except Exception as e:
             raise ValueError(f"Failed to increment message count: {str(e)}")
@@ -9,6 +9,8 @@ from models.database.message import MessageORM, MessageRole
 class MessageRepository(BaseRepository[MessageORM]):
     """Repository for chat message management"""
     
+    __slots__ = ()
+    
     def __init__(self, session: AsyncSession):
         super().__init__(session, MessageORM)
     
@@ -41,6 +43,24 @@ class MessageRepository(BaseRepository[MessageORM]):
         
         return await self.create(**message_data)
     
+    async def create_messages_bulk(self, messages: List[Dict[str, Any]]) -> List[MessageORM]:
+        """Create several messages with a single flush (IDs are generated client-side)"""
+        import uuid
+        
+        records = []
+        for message in messages:
+            records.append({
+                "message_id": message.get("message_id") or f"msg::{uuid.uuid4().hex[:12]}",
+                "session_id": message["session_id"],
+                "role": message["role"],
+                "content": message["content"],
+                "extra_metadata": message.get("extra_metadata") or {},
+                "input_tokens": message.get("input_tokens"),
+                "output_tokens": message.get("output_tokens")
+            })
+        
+        return await self.bulk_create(records, skip_refresh=True)
+    
     async def get_session_messages(
         self, 
         session_id: str,
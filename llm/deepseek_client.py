@@ -1,6 +1,6 @@
 import logging
 from typing import List, Dict, Optional
-from .fpt_client import call_fpt_api_async
+from .fpt_client import call_fpt_api_async, call_fpt_api_with_usage_async
 from exceptions import LLMError
 
 logger = logging.getLogger("deepseek_client")
@@ -73,10 +73,10 @@ class DeepSeekFPTClient:
     
     async def chat_with_thinking(self, messages, temperature=0.1, max_tokens=2048, timeout=60):
         """
-        Chat completion that returns both content and thinking
+        Chat completion that returns content, thinking and provider token usage
         """
         try:
-            response = await call_fpt_api_async(
+            result = await call_fpt_api_with_usage_async(
                 base_url=self.base_url,
                 api_key=self.api_key,
                 model=self.model,
@@ -86,6 +86,7 @@ class DeepSeekFPTClient:
                 max_retries=2,
                 timeout=timeout
             )
+            response = result["content"]
             
             # Log raw response for debugging
             logger.info(f"📜 Raw response preview: {response[:300]}...")
@@ -96,7 +97,8 @@ class DeepSeekFPTClient:
             
             return {
                 "content": clean_response,
-                "thinking": thinking_content
+                "thinking": thinking_content,
+                "usage": result["usage"]
             }
             
         except LLMError as e:
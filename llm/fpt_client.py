@@ -1,7 +1,7 @@
 import time
 import asyncio
 import requests
-from typing import List, Dict
+from typing import List, Dict, Any
 from exceptions import LLMError
 
 def call_fpt_api(
@@ -17,6 +17,24 @@ def call_fpt_api(
     """
     Simple FPT Cloud API client - returns content string only.
     """
+    return call_fpt_api_with_usage(
+        base_url, api_key, model, messages, max_tokens, temperature, max_retries, timeout
+    )["content"]
+
+
+def call_fpt_api_with_usage(
+    base_url: str, 
+    api_key: str, 
+    model: str, 
+    messages: List[Dict[str, str]], 
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    max_retries: int = 2,
+    timeout: int = 60
+) -> Dict[str, Any]:
+    """
+    FPT Cloud API client - returns content plus provider-reported token usage.
+    """
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {api_key}"
@@ -45,7 +63,14 @@ def call_fpt_api(
             if response.status_code == 200:
                 try:
                     data = response.json()
-                    return data["choices"][0]["message"]["content"]
+                    usage = data.get("usage") or {}
+                    return {
+                        "content": data["choices"][0]["message"]["content"],
+                        "usage": {
+                            "prompt_tokens": usage.get("prompt_tokens") or 0,
+                            "completion_tokens": usage.get("completion_tokens") or 0
+                        }
+                    }
                 except (KeyError, IndexError) as e:
                     raise LLMError(f"Invalid LLM response format: {e}", "LLM_INVALID_RESPONSE")
             
@@ -121,6 +146,27 @@ async def call_fpt_api_async(
         base_url, api_key, model, messages, max_tokens, temperature, max_retries, timeout
     )
 
+async def call_fpt_api_with_usage_async(
+    base_url: str, 
+    api_key: str, 
+    model: str, 
+    messages: List[Dict[str, str]], 
+    max_tokens: int = 1024,
+    temperature: float = 0.7,
+    max_retries: int = 2,
+    timeout: int = 60
+) -> Dict[str, Any]:
+    """
+    Async wrapper for FPT Cloud API that also returns token usage
+    """
+    loop = asyncio.get_event_loop()
+    
+    return await loop.run_in_executor(
+        None, 
+        call_fpt_api_with_usage,
+        base_url, api_key, model, messages, max_tokens, temperature, max_retries, timeout
+    )
+
 def create_fpt_client(base_url: str, api_key: str) -> FPTCloudClient:
     """Factory function to create FPT Cloud client"""
     return FPTCloudClient(base_url, api_key)
@@ -7,6 +7,7 @@ if sys.platform == 'win32':
 
 import logging
 import warnings
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.cors import CORSMiddleware
@@ -22,6 +23,7 @@ from api.knowledge_base import router as kb_router
 from api.ragflow_raptor import router as ragflow_raptor_router
 from api.chat_completion import router as chat_router
 from api.assistant import router as assistant_router
+from chunking.chunk_clean import shutdown_chunk_pool
 
 warnings.filterwarnings("ignore", module="umap")
 warnings.filterwarnings("ignore", message=".*n_jobs.*overridden.*random_state.*")
@@ -39,7 +41,14 @@ logging.getLogger("raptor.mcp.langflow").setLevel(logging.INFO)
 # Reduce faiss loader noise
 logging.getLogger("faiss.loader").setLevel(logging.WARNING)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the cleaning/chunking worker processes with the app
+    shutdown_chunk_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -58,4 +58,17 @@ class AssistantORM(Base):
     __table_args__ = (
         Index("ix_assistants_tenant_kb", "tenant_id", "kb_id"),
         Index("ix_assistants_tenant_id", "tenant_id"),
+        # Trigram GIN indexes let search_assistants' '%query%' ILIKE use an index scan (needs pg_trgm)
+        Index(
+            "ix_assistants_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_assistants_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"}
+        ),
     )
@@ -2,8 +2,8 @@ from __future__ import annotations
 from typing import List, Optional
 from datetime import datetime
 
-from sqlalchemy import String, Text, Integer, TIMESTAMP, ForeignKey, Index
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import String, Text, Integer, TIMESTAMP, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -68,6 +68,13 @@ class ChunkORM(Base):
     token_count: Mapped[Optional[int]] = mapped_column(Integer)
     meta: Mapped[Optional[dict]] = mapped_column(JSONB)
     
+    # Full-text vector maintained by Postgres; deferred so chunk loads don't carry it
+    content_tsv: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', content)", persisted=True),
+        deferred=True
+    )
+    
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True),
         server_default=func.now(),
@@ -82,6 +89,8 @@ class ChunkORM(Base):
     __table_args__ = (
         Index("ix_chunks_doc_index", "doc_id", "chunk_index"),
         Index("ix_chunks_doc_chunk_unique", "doc_id", "chunk_index", unique=True),
+        # GIN index behind search_chunks_by_content's content_tsv @@ plainto_tsquery match
+        Index("ix_chunks_content_tsv", "content_tsv", postgresql_using="gin"),
     )
 
 
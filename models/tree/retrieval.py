@@ -30,6 +30,7 @@ class RetrievedNode(BaseModel):
     level: int = Field(...)
     token_count: float = Field(...)
     meta: dict = Field(default_factory=dict)
+    source_id: str = Field("")  # "{doc_id}_chunk_{chunk_index}", set once at retrieval
 
 class RetrievalStats(BaseModel):
     """Statistics about the retrieval process"""
@@ -7,6 +7,7 @@ from typing import List, Tuple, Optional
 from models import DocumentProcessSummary
 from embed.embedding import embed_texts
 from config.embedding import get_embedding_settings
+from config.database import get_database_settings
 from database.repository_factory import get_repositories
 from models.database import EmbeddingOwnerType
 from utils.math_utils import token_count
@@ -219,14 +220,14 @@ class OptimizedDocumentProcessor:
             async with get_repositories() as repos:
                 # Check for duplicates
                 content_hash = calculate_content_hash(file_content)
-                existing_doc = await repos.document_repo.find_by_checksum(
+                existing_doc_id = await repos.document_repo.find_doc_id_by_checksum(
                     tenant_id, kb_id, content_hash
                 )
                 
-                if existing_doc:
-                    logger.info(f"📄 Document already exists: {existing_doc.doc_id}")
+                if existing_doc_id:
+                    logger.info(f"📄 Document already exists: {existing_doc_id}")
                     return create_document_summary(
-                        doc_id=existing_doc.doc_id,
+                        doc_id=existing_doc_id,
                         tenant_id=tenant_id,
                         kb_id=kb_id,
                         filename=filename,
@@ -326,11 +327,12 @@ class OptimizedDocumentProcessor:
                         }
                     })
                 
-                # 🚀 BULK SAVE: ALL embeddings in smaller chunks to avoid timeout
+                # 🚀 BULK SAVE: ALL embeddings in batched flushes within this one transaction
                 logger.info(f"💾 Saving {len(embedding_data_list)} embeddings in chunks...")
                 
-                # Split into smaller chunks (reduced from 50 to 20 for faster refresh)
-                chunk_size = 20  # ✅ Reduce chunk size to avoid refresh timeouts
+                # One flush per insertmanyvalues page: refresh is skipped, so small pages
+                # only added round-trips (was 20 rows per flush)
+                chunk_size = get_database_settings().insertmanyvalues_page_size
                 for i in range(0, len(embedding_data_list), chunk_size):
                     chunk = embedding_data_list[i:i + chunk_size]
                     logger.info(f"💾 Saving embedding chunk {i//chunk_size + 1}/{(len(embedding_data_list) + chunk_size - 1)//chunk_size}: {len(chunk)} embeddings")
@@ -3,7 +3,7 @@ import asyncio
 from typing import List, Optional, Callable, Dict, Any
 
 from models.document import DocumentChunk
-from chunking.chunk_clean import clean_content
+from chunking.chunk_clean import clean_content_async
 from chunking.hierarchical_chunker import HierarchicalChunker
 from config.chunking import get_chunking_settings
 from utils.progress import chunking_progress_context, create_chunking_progress_callback
@@ -48,7 +48,7 @@ class DocumentProcessingHelper:
                 
                 # Clean and extract text content
                 original_content = file_content.decode('utf-8', errors='ignore')
-                clean_text = clean_content(original_content)
+                clean_text = await clean_content_async(original_content)
                 
                 if not clean_text or len(clean_text.strip()) < 10:
                     logger.warning("Document content too short after cleaning")
@@ -379,6 +379,7 @@ class EnhancedRAGFlowRetrieval:
                         content=chunk['content'],
                         level=0 if chunk['owner_type'] == 'chunk' else 1,
                         token_count=int(chunk_tokens),
+                        source_id=f"{chunk['doc_id']}_chunk_{chunk['chunk_index']}",
                         meta={
                             'owner_type': chunk['owner_type'],
                             'embedding_model': chunk['embedding_model'],
@@ -16,6 +16,11 @@ except ImportError:
 logger = logging.getLogger("persistent_vector_index")
 
 
+def _new_faiss_index(dimension: int):
+    """Inner-product index over fp16-quantized vectors (half the memory/bandwidth of IndexFlatIP)"""
+    return faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+
+
 class VectorIndex:
     """
     Fast vector similarity search with FAISS
@@ -30,8 +35,8 @@ class VectorIndex:
         self.executor = ThreadPoolExecutor(max_workers=4)
         
         if FAISS_AVAILABLE:
-            # Use FAISS IndexFlatIP for cosine similarity
-            self.index = faiss.IndexFlatIP(dimension)
+            # Inner product over normalized fp16 vectors for cosine similarity
+            self.index = _new_faiss_index(dimension)
             logger.info(f"🚀 FAISS index created with dimension {dimension}")
         else:
             # Fallback to numpy storage
@@ -53,7 +58,9 @@ class VectorIndex:
             normalized_vectors = vectors_array / norms
             
             if FAISS_AVAILABLE and self.index is not None:
-                # Add to FAISS index
+                # Add to FAISS index (fp16 quantizer needs no training data, guard kept for other types)
+                if not self.index.is_trained:
+                    self.index.train(normalized_vectors)
                 self.index.add(normalized_vectors)
             else:
                 # Add to numpy storage
@@ -169,7 +176,8 @@ class VectorIndex:
     def _estimate_memory_usage(self) -> float:
         """Estimate memory usage in MB"""
         try:
-            vector_size = len(self.chunk_ids) * self.dimension * 4  # 4 bytes per float32
+            bytes_per_value = 2 if FAISS_AVAILABLE and self.index is not None else 4  # fp16 in FAISS, float32 in numpy
+            vector_size = len(self.chunk_ids) * self.dimension * bytes_per_value
             metadata_size = len(self.metadata) * 500  # Rough estimate
             return (vector_size + metadata_size) / (1024 * 1024)
         except:
@@ -272,7 +280,7 @@ class PersistentVectorIndex(VectorIndex):
             # Clean up partial state
             self.chunk_ids = []
             self.metadata = []
-            self.index = faiss.IndexFlatIP(self.dimension) if FAISS_AVAILABLE else None
+            self.index = _new_faiss_index(self.dimension) if FAISS_AVAILABLE else None
             return False
     
     def is_index_stale(self, current_embedding_count: int, tolerance: int = 5) -> bool:
@@ -0,0 +1,35 @@
+from database.repositories.document_repository import ChunkRepository
+from models.database import ChunkORM, DocumentORM, KnowledgeBaseORM
+
+
+async def _seed_chunks(session, contents):
+    session.add(KnowledgeBaseORM(kb_id="kb", tenant_id="t", name="kb"))
+    session.add(DocumentORM(doc_id="d", tenant_id="t", kb_id="kb", filename="d.md"))
+    session.add_all([
+        ChunkORM(chunk_id=f"d_{i}", doc_id="d", content=content, chunk_index=i)
+        for i, content in enumerate(contents)
+    ])
+    await session.flush()
+
+
+def test_search_chunks_by_content_matches_whole_words(run_in_db):
+    queries = ["embedding", "POSTGRES embedding", "embed", "gres", "embedding headers"]
+
+    async def body(session):
+        await _seed_chunks(session, [
+            "Embedding vectors are stored in Postgres",
+            "Chunks are split at markdown headers",
+        ])
+        repo = ChunkRepository(session)
+        return {
+            query: [chunk.chunk_id for chunk in await repo.search_chunks_by_content("t", "kb", query)]
+            for query in queries
+        }
+
+    results = run_in_db(body)
+
+    assert results["embedding"] == ["d_0"]  # Case-insensitive whole word
+    assert results["POSTGRES embedding"] == ["d_0"]  # All words, any order
+    assert results["embed"] == []  # Prefix: no substring matching
+    assert results["gres"] == []  # Infix: no substring matching
+    assert results["embedding headers"] == []  # Words must share one chunk
@@ -0,0 +1,50 @@
+from database.repositories import embedding_repository
+from database.repositories.embedding_repository import EmbeddingRepository
+from models.database import EmbeddingOwnerType
+
+DIMENSION = 3
+
+
+def _store_twice(run_in_db, monkeypatch, threshold):
+    """Insert five embeddings, then upsert three of them (two updated, one new), on one path"""
+    monkeypatch.setattr(embedding_repository, "COPY_UPSERT_THRESHOLD", threshold)
+
+    async def body(session):
+        repo = EmbeddingRepository(session)
+        await repo.store_embeddings(
+            "t", "kb", EmbeddingOwnerType.chunk,
+            [f"c{i}" for i in range(5)],
+            [[i, 0.5, -0.25] for i in range(5)],
+            model="m1", dimension=DIMENSION, metadata={"round": 1}
+        )
+        stored = await repo.store_embeddings(
+            "t", "kb", EmbeddingOwnerType.chunk,
+            ["c3", "c4", "c5"],
+            [[0.125, 1.0, 2.0], [4.0, 0.0, -1.0], [0.0, 0.0, 1.0]],
+            model="m2", dimension=DIMENSION, metadata={"round": 2}
+        )
+        everything = await repo.get_many(tenant_id="t", kb_id="kb")
+        return [_row(embedding) for embedding in stored], sorted(_row(embedding) for embedding in everything)
+
+    return run_in_db(body)
+
+
+def _row(embedding):
+    return (
+        embedding.id, embedding.tenant_id, embedding.kb_id, embedding.owner_type,
+        embedding.owner_id, embedding.model, embedding.dimension,
+        [float(value) for value in embedding.vector], embedding.meta
+    )
+
+
+def test_copy_upsert_matches_insert_upsert(run_in_db, monkeypatch):
+    # Threshold 10**6 keeps both calls on INSERT ... ON CONFLICT, 0 sends both through COPY
+    insert_stored, insert_rows = _store_twice(run_in_db, monkeypatch, 10**6)
+    copy_stored, copy_rows = _store_twice(run_in_db, monkeypatch, 0)
+
+    # COPY's INSERT ... SELECT doesn't promise RETURNING order, so compare as sets of rows
+    assert sorted(copy_stored) == sorted(insert_stored)
+    assert copy_rows == insert_rows
+    assert len(insert_rows) == 6
+    assert [row[0] for row in sorted(insert_stored)] == ["chunk::c3", "chunk::c4", "chunk::c5"]
+    assert all(row[5] == "m2" and row[8] == {"round": 2} for row in insert_stored)
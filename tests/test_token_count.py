@@ -0,0 +1,25 @@
+import pytest
+
+from utils import token_count, token_count_batch
+
+
+@pytest.fixture
+def cl100k():
+    tiktoken = pytest.importorskip("tiktoken")
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # Encoding file is downloaded on first use
+        pytest.skip(f"cl100k_base encoding not available: {e}")
+
+
+def test_batch_and_single_counts_agree_on_special_token_text(cl100k):
+    texts = [
+        "plain sentence about chunking",
+        "a document that mentions <|endoftext|> in its body",
+        "<|endoftext|>",
+        "mixed <|fim_prefix|> markers and\nnew lines <|endofprompt|>",
+    ]
+
+    assert token_count_batch(texts) == [token_count(text) for text in texts]
+    # Counted as ordinary text, not the word-count fallback
+    assert token_count(texts[2]) == len(cl100k.encode_ordinary(texts[2])) > 1
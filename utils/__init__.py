@@ -2,7 +2,8 @@ from .math_utils import (
     cosine_similarity,
     euclidean_distance,
     normalize_vector,
-    token_count
+    token_count,
+    token_count_batch
 )
 from .error_handlers import (
     handle_embedding_errors,
@@ -40,6 +41,7 @@ __all__ = [
     "euclidean_distance", 
     "normalize_vector",
     "token_count",
+    "token_count_batch",
     
     # Error handlers
     "handle_embedding_errors",
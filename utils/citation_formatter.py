@@ -51,7 +51,7 @@ def format_context_passages_for_frontend(retrieved_nodes: List = None, user_quer
         meta = getattr(chunk, 'metadata', getattr(chunk, 'meta', {}))
         doc_id = meta.get('doc_id', 'unknown')
         chunk_index = meta.get('chunk_index', 0)
-        source_id = f"{doc_id}_chunk_{chunk_index}"
+        source_id = getattr(chunk, 'source_id', '') or f"{doc_id}_chunk_{chunk_index}"
         
         # Generate relevant excerpt
         excerpt = _extract_best_excerpt(content, thinking_content, user_query, 150, model_answer)
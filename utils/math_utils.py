@@ -1,4 +1,5 @@
 import logging
+import os
 import numpy as np
 from typing import List
 
@@ -100,7 +101,26 @@ def token_count(text: str) -> int:
     
     try:
         tokenizer = tiktoken.get_encoding("cl100k_base")  # GPT-4 tokenizer
-        return len(tokenizer.encode(text))
+        # Special-token strings count as plain text, same as token_count_batch
+        return len(tokenizer.encode_ordinary(text))
     except Exception as e:
         logger.warning(f"Token counting failed: {e}")
         return len(text.split())  # Fallback to word count
+
+
+def token_count_batch(texts: List[str]) -> List[int]:
+    """Count tokens for many texts with a single batched tokenizer call"""
+    if not texts:
+        return []
+    
+    if tiktoken is None:
+        logger.warning("tiktoken not available, using word count estimation")
+        return [len(text.split()) for text in texts]
+    
+    try:
+        tokenizer = tiktoken.get_encoding("cl100k_base")  # GPT-4 tokenizer
+        ids_batch = tokenizer.encode_ordinary_batch(texts, num_threads=os.cpu_count() or 8)
+        return [len(ids) for ids in ids_batch]
+    except Exception as e:
+        logger.warning(f"Batch token counting failed: {e}")
+        return [token_count(text) for text in texts]